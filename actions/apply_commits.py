@@ -0,0 +1,93 @@
+import datetime
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
+
+from actions.create_repo import create_repo, create_repo_async
+from git.dates import to_seconds
+from git.git import Git
+from utils.instrumentation import instrumentation
+
+if TYPE_CHECKING:
+    from actions.generate_churn import Churn
+    from actions.generate_topology import Topology
+    from git.async_git import AsyncGit
+
+
+def apply_commits(git: Git, name: str, directory: str, plan: Iterable[Tuple[int, str]], after: Optional[datetime.datetime] = None, worktree: bool = True, churn: Optional["Churn"] = None, topology: Optional["Topology"] = None) -> int:
+    """
+    Write a commit plan into a repository.
+
+    Args:
+        git (Git): The writer to commit with.
+        name (str): The name of the repository.
+        directory (str): The directory of the repository.
+        plan (Iterable[Tuple[int, str]]): The timestamp, in naive local seconds, and message of every commit.
+        after (datetime.datetime, optional): Extend an existing history, skipping any planned commits
+            up to this timestamp, rather than creating the repository from the first one.
+        worktree (bool): Whether to check the templates out when creating the repository, see create_repo.
+        churn (Churn, optional): Changes files in every commit after the initial one, rather than committing empty.
+        topology (Topology, optional): Spreads the commits after the initial one over feature branches and merges.
+
+    Returns:
+        int: The number of commits written.
+    """
+    initial_commit = after is None
+    after_seconds = after and to_seconds(after)
+    count = 0
+
+    for at, message in plan:
+        if after_seconds is not None and at <= after_seconds:
+            continue
+
+        if initial_commit:
+            # First create the repository
+            create_repo(git, name, directory, at, worktree)
+            initial_commit = False
+        else:
+            if churn is not None:
+                churn.advance()
+
+            if topology is not None:
+                git.commit(at, message, *topology.place())
+            else:
+                git.commit(at, message)
+
+        count += 1
+        instrumentation.advance(at)
+
+    return count
+
+
+async def apply_commits_async(git: "AsyncGit", name: str, directory: str, plan: Iterable[Tuple[int, str]], after: Optional[datetime.datetime] = None) -> int:
+    """
+    Write a commit plan into a repository, awaiting each commit so other repositories can progress meanwhile.
+
+    Args:
+        git (AsyncGit): The writer to commit with.
+        name (str): The name of the repository.
+        directory (str): The directory of the repository.
+        plan (Iterable[Tuple[int, str]]): The timestamp, in naive local seconds, and message of every commit.
+        after (datetime.datetime, optional): Extend an existing history, skipping any planned commits
+            up to this timestamp, rather than creating the repository from the first one.
+
+    Returns:
+        int: The number of commits written.
+    """
+    initial_commit = after is None
+    after_seconds = after and to_seconds(after)
+    count = 0
+
+    for at, message in plan:
+        if after_seconds is not None and at <= after_seconds:
+            continue
+
+        if initial_commit:
+            # First create the repository
+            await create_repo_async(git, name, directory, at)
+            initial_commit = False
+        else:
+            await git.commit(at, message)
+
+        count += 1
+        instrumentation.advance(at)
+
+    return count
@@ -0,0 +1,114 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+from actions.generate_topology import BRANCH_PREFIX
+from git.git import Git
+
+# Kept inside .git, so it never shows up in the worktree and goes wherever the repository goes
+CHECKPOINT_FILE = "bathroom_tiles_checkpoint.json"
+
+# Bump whenever what's recorded changes, so an older checkpoint is never misread
+CHECKPOINT_VERSION = 2
+
+
+def checkpoint_path(directory: str) -> str:
+    """
+    Get where a repository's checkpoint is kept.
+
+    Args:
+        directory (str): The directory of the repository.
+
+    Returns:
+        str: The path of the checkpoint file.
+    """
+    return os.path.join(directory, ".git", CHECKPOINT_FILE)
+
+
+def write_checkpoint(directory: str, state: Dict[str, Any]) -> None:
+    """
+    Record how far a run has got, replacing any earlier checkpoint in one step.
+
+    Only called once the writer has been flushed, so everything the checkpoint
+    points at is already on disk.
+
+    Args:
+        directory (str): The directory of the repository.
+        state (Dict[str, Any]): Everything needed to carry on from here, see generate_streamed_history.
+    """
+    path = checkpoint_path(directory)
+    temporary_path = path + ".tmp"
+
+    try:
+        with open(temporary_path, "w") as f:
+            json.dump({"version": CHECKPOINT_VERSION, **state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary_path, path)
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred while writing the checkpoint: {str(e)}") from e
+
+
+def read_checkpoint(directory: str, key: str) -> Dict[str, Any]:
+    """
+    Read the last checkpoint of an unfinished run, checking it was made by the same parameters.
+
+    Args:
+        directory (str): The directory of the repository.
+        key (str): The key of the parameters which shape the history, see cache_key.
+
+    Returns:
+        Dict[str, Any]: The recorded state, see write_checkpoint.
+    """
+    try:
+        with open(checkpoint_path(directory), "r") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"{directory} has no checkpoint to resume from") from None
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred while reading the checkpoint: {str(e)}") from e
+
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"The checkpoint in {directory} was written by another version, so can't be resumed")
+
+    if state.get("key") != key:
+        raise ValueError(f"The checkpoint in {directory} was written with different parameters, so can't be resumed")
+
+    return state
+
+
+def remove_checkpoint(directory: str) -> None:
+    # Finished, so there is nothing left to resume
+    try:
+        os.remove(checkpoint_path(directory))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred while removing the checkpoint: {str(e)}") from e
+
+
+def restore_refs(git: Git, refs: Dict[str, str], tree: Optional[str] = None) -> None:
+    """
+    Put the refs back where the checkpoint left them, before the writer starts.
+
+    A run can die part way through publishing, after a checkpoint, so the branch may have
+    moved past it and feature branches may have been created or merged since.
+
+    Args:
+        git (Git): The writer, not yet started.
+        refs (Dict[str, str]): The object id of every ref the run was moving.
+        tree (str, optional): The tree the object store writers were committing, which
+            isn't always the branch tip's when feature branches churn files too.
+    """
+    for ref, object_id in refs.items():
+        if git.rev_parse(ref) != object_id:
+            git.update_ref(ref, object_id)
+
+    for ref in git.list_refs(BRANCH_PREFIX).keys() - refs.keys():
+        git.delete_ref(ref)
+
+    if tree is not None:
+        # Starts the writer from the branch just restored, then moves it on to the checkpointed tree
+        git.begin()
+        git.tree = tree
@@ -1,18 +1,113 @@
 import datetime
 import os
-
-from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Tuple, Union
 
 from git.git import Git
+from git.objects import ObjectStoreGit
+from utils.cache import hash_tree
+from utils.instrumentation import instrument
+
+if TYPE_CHECKING:
+    # Only needed by the async driver, asyncio is slow to import
+    from git.async_git import AsyncGit
+    from jinja2 import Template
+
+INITIAL_COMMIT_MESSAGE = "feat: Initial commit"
+
+TEMPLATES_DIRECTORY = "templates"
+
+
+@lru_cache(maxsize=None)
+def template_tree_hash() -> str:
+    """
+    Hash the templates directory, once per process.
+
+    :return: The hex sha256 of the templates directory's contents.
+    """
+    return hash_tree(TEMPLATES_DIRECTORY)
+
+
+@lru_cache(maxsize=None)
+def load_templates(tree_hash: str) -> List[Tuple[str, "Template"]]:
+    """
+    Compile every template, keeping them for the rest of the process.
+
+    Compiled bytecode is also cached on disk in a directory per template tree, so later
+    processes skip compiling too, and editing the templates never reuses stale bytecode.
+
+    :param tree_hash: The hash of the templates directory, see template_tree_hash.
+    :return: The slash separated relative path and compiled template of every file, in a stable order.
+    """
+
+    # Imported here as jinja2 is slow to import, and cache hits never render anything
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    bytecode_cache = None
+    bytecode_directory = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "bathroom_tiles", "templates", tree_hash)
+    try:
+        os.makedirs(bytecode_directory, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_directory)
+    except OSError:
+        # Not being able to cache only costs compiling the templates again
+        pass
+
+    # Start up the templating system
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIRECTORY), bytecode_cache=bytecode_cache)
+
+    templates = []
+
+    # Walk through the templates directory
+    for root, directories, files in os.walk(TEMPLATES_DIRECTORY):
+        directories.sort()
+
+        for file in sorted(files):
+            relative_path = os.path.relpath(os.path.join(root, file), TEMPLATES_DIRECTORY).replace(os.sep, "/")
+            templates.append((relative_path, env.get_template(relative_path)))
 
+    return templates
 
-def create_repo(git: Git, name: str, directory: str, at: datetime.datetime) -> None:
+
+def render_files(name: str) -> List[Tuple[str, bytes]]:
+    """
+    Render every file in the templates directory.
+
+    :param name: The name of the repository.
+    :return: The slash separated relative path and rendered contents of every file.
+    """
+    generated_on = datetime.date.today().isoformat()
+
+    return [(relative_path, (template.render(repo_name=name, generated_on=generated_on) + "\n").encode()) for relative_path, template in load_templates(template_tree_hash())]
+
+
+@instrument("render_templates")
+def render_templates(name: str, directory: str) -> None:
+    """
+    Render every file in the templates directory into a repository's worktree.
+
+    :param name: The name of the repository.
+    :param directory: The directory of the repository.
+    """
+    for relative_path, contents in render_files(name):
+        output_path = os.path.join(directory, relative_path)
+
+        # Ensure the output directory exists
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        with open(output_path, "wb") as f:
+            f.write(contents)
+
+
+@instrument("create_repo")
+def create_repo(git: Git, name: str, directory: str, at: Union[datetime.datetime, int], worktree: bool = True) -> None:
     """
     Create a new Git repository in the specified working directory.
 
     :param git: An instance of the Git class to interact with the Git system.
     :param name: The name of the new repository.
     :param directory: The directory where the repository will be created.
+    :param worktree: Whether to check the rendered templates out, otherwise an object store backend
+        writes them straight into blobs and trees, leaving the worktree and index empty.
     """
 
     # Check if the directory already exists
@@ -26,29 +121,44 @@ def create_repo(git: Git, name: str, directory: str, at: datetime.datetime) -> N
     # Initialize a new Git repository
     git.init()
 
-    # Start up the templating system
-    env = Environment(loader=FileSystemLoader("templates"))
+    if worktree:
+        # Render the templates into the worktree
+        render_templates(name, directory)
+        git.stage()
+    elif isinstance(git, ObjectStoreGit):
+        # Render the templates straight into the object store
+        git.stage_files(render_files(name))
+    else:
+        raise ValueError("Only the object store backends (objects/pack) can skip the worktree")
+
+    # Make the initial commit
+    git.commit(at, INITIAL_COMMIT_MESSAGE)
 
-    # Walk through the templates directory
-    for root, _, files in os.walk("templates"):
-        for file in files:
-            template_path = os.path.join(root, file)
-            relative_path = os.path.relpath(template_path, "templates")
-            output_path = os.path.join(directory, relative_path)
 
-            # Ensure the output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+@instrument("create_repo")
+async def create_repo_async(git: "AsyncGit", name: str, directory: str, at: Union[datetime.datetime, int]) -> None:
+    """
+    Create a new Git repository in the specified working directory, awaiting each git call.
 
-            # Render the template and write to the output file
-            template = env.get_template(relative_path)
-            rendered = template.render(
-                repo_name=name,
-                generated_on=datetime.date.today().isoformat(),
-            )
+    :param git: An instance of the AsyncGit class to interact with the Git system.
+    :param name: The name of the new repository.
+    :param directory: The directory where the repository will be created.
+    """
+
+    # Check if the directory already exists
+    if os.path.exists(directory):
+        print(f"Directory {directory} already exists. Please choose a different name.")
+        return
+
+    # Create the new directory
+    os.makedirs(directory)
+
+    # Initialize a new Git repository
+    await git.init()
 
-            with open(output_path, "w") as f:
-                f.write(rendered + "\n")
+    # Render the templates into the worktree
+    render_templates(name, directory)
 
     # Make the initial commit
-    git.stage()
-    git.commit(at, "feat: Initial commit")
+    await git.stage()
+    await git.commit(at, INITIAL_COMMIT_MESSAGE)
@@ -0,0 +1,189 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from actions.generate_commit_message import nouns, verbs
+from git.objects import ObjectStoreGit
+from git.tree import TreeBuilder
+from utils.instrumentation import instrument
+
+# Files are built from a pool of lines of this many bytes each, including the newline
+LINE_LENGTH = 64
+POOL_LINES = 4096
+
+# Never churned, the repository must always declare itself fake
+PROTECTED_PATHS = {".THIS_IS_FAKE"}
+
+# Added files are spread over directories of at most this many files each
+FILES_PER_DIRECTORY = 256
+
+MODIFY, ADD, DELETE = range(3)
+
+
+def generate_lines(rng: np.random.Generator) -> np.ndarray:
+    """
+    Build a pool of lines of words, indented to a fixed width so files can be assembled from them by numpy.
+
+    Args:
+        rng (np.random.Generator): The random number generator to draw from.
+
+    Returns:
+        np.ndarray: A (POOL_LINES, LINE_LENGTH) array of bytes, each row ending in a newline.
+    """
+    words = [word for word in verbs + nouns if word.isascii()]
+    lines = np.empty((POOL_LINES, LINE_LENGTH), dtype=np.uint8)
+
+    for row, (width, indices) in enumerate(zip(rng.integers(8, LINE_LENGTH, POOL_LINES).tolist(), rng.integers(0, len(words), (POOL_LINES, 8)).tolist())):
+        line = ""
+        for index in indices:
+            if len(line) + len(words[index]) >= width:
+                break
+            line += " " + words[index]
+
+        lines[row] = np.frombuffer(line.strip().encode()[: LINE_LENGTH - 1].rjust(LINE_LENGTH - 1) + b"\n", dtype=np.uint8)
+
+    return lines
+
+
+def generate_contents(rng: np.random.Generator, lines: np.ndarray, sizes: np.ndarray) -> List[bytes]:
+    """
+    Generate text for many files at once, from random lines of a pool.
+
+    Real text compresses and deltas far better than random bytes, and far faster, so
+    this keeps generated repositories a realistic shape without zlib dominating.
+
+    Args:
+        rng (np.random.Generator): The random number generator to draw from.
+        lines (np.ndarray): The pool of lines, see generate_lines.
+        sizes (np.ndarray): The size in bytes of each file.
+
+    Returns:
+        List[bytes]: The contents of each file.
+    """
+    # One draw and one copy out of numpy for every file together, rather than anything per byte
+    counts = -(-sizes // LINE_LENGTH)
+    data = lines[rng.integers(0, len(lines), int(counts.sum()))].tobytes()
+    offsets = np.concatenate(([0], np.cumsum(counts)))[:-1] * LINE_LENGTH
+
+    # The last line of each file is cut short to hit its size exactly
+    return [data[start:end] for start, end in zip(offsets.tolist(), (offsets + sizes).tolist())]
+
+
+class Churn(object):
+    """
+    Adds, modifies and deletes files for every commit, starting from the templates.
+
+    Blobs and trees are written straight into the object store, so the worktree and
+    index are never touched. Only the trees along the changed paths are rewritten.
+
+    Methods:
+        advance() -> None:
+            Applies one commit's changes, pointing the writer's next commit at the new tree.
+
+        state() -> Dict[str, Any]:
+            Records everything the next commit's changes depend on, for a checkpoint.
+
+        restore(state: Dict[str, Any]) -> None:
+            Carries on from a checkpoint, once the writer is back on the checkpointed tree.
+    """
+
+    def __init__(self, git: ObjectStoreGit, rng: np.random.Generator, files: int, file_size: int, ratio: Tuple[float, float, float]) -> None:
+        self.git = git
+        self.rng = rng
+        self.files = files
+        self.file_size = file_size
+        self.ratio = ratio
+        self.lines = generate_lines(rng)
+        self.builder: Optional[TreeBuilder] = None
+        self.paths: List[str] = []
+        self.indices: Dict[str, int] = {}
+        self.next_file = 0
+
+    @instrument("churn")
+    def advance(self) -> None:
+        if self.builder is None:
+            # Start from whichever tree the writer is on, the templates or the tip being extended
+            self.builder = self.git.read_tree()
+            for path in self.builder.paths():
+                if path not in PROTECTED_PATHS:
+                    self._track(path)
+
+        operations = self.rng.choice(3, size=self.files, p=self.ratio)
+        # Geometric sizes have the requested mean, with the long tail real files have
+        sizes = self.rng.geometric(1 / self.file_size, size=self.files)
+
+        # Only the final state of each path is written, so no blob is left unreferenced
+        changes: Dict[str, Optional[bytes]] = {}
+        created = set()
+
+        for operation, contents in zip(operations.tolist(), generate_contents(self.rng, self.lines, sizes)):
+            # There's nothing to modify or delete once every file is gone
+            if operation != ADD and not self.paths:
+                operation = ADD
+
+            if operation == ADD:
+                path = self._new_path()
+                self._track(path)
+                created.add(path)
+                changes[path] = contents
+                continue
+
+            path = self.paths[int(self.rng.integers(len(self.paths)))]
+
+            if operation == MODIFY:
+                changes[path] = contents
+            elif path in created:
+                # Added and deleted within the same commit, so it never reaches the tree
+                self._forget(path)
+                created.discard(path)
+                del changes[path]
+            else:
+                self._forget(path)
+                changes[path] = None
+
+        for path, contents in changes.items():
+            if contents is None:
+                self.builder.remove(path)
+            else:
+                self.builder.add(path, self.git.write_object(b"blob", contents))
+
+        self.git.tree = self.builder.write(self.git.write_object)
+
+    def state(self) -> Dict[str, Any]:
+        # The order of the paths decides which are picked, so it's kept rather than read back from the tree,
+        # and there are none until the first commit's changes, which read them from the templates
+        return {
+            "rng": self.rng.bit_generator.state,
+            "paths": self.paths if self.builder is not None else None,
+            "next_file": self.next_file,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.rng.bit_generator.state = state["rng"]
+        self.next_file = state["next_file"]
+
+        if state["paths"] is not None:
+            self.builder = self.git.read_tree()
+            self.paths = list(state["paths"])
+            self.indices = {path: index for index, path in enumerate(self.paths)}
+
+    def _new_path(self) -> str:
+        while True:
+            path = f"src/generated/{self.next_file // FILES_PER_DIRECTORY:04d}/{self.next_file % FILES_PER_DIRECTORY:03d}.txt"
+            self.next_file += 1
+
+            # An extended repository may already have files from an earlier run
+            if path not in self.indices:
+                return path
+
+    def _track(self, path: str) -> None:
+        self.indices[path] = len(self.paths)
+        self.paths.append(path)
+
+    def _forget(self, path: str) -> None:
+        # Swap the last path into the gap, so removal doesn't shift every later path
+        index = self.indices.pop(path)
+        last = self.paths.pop()
+        if last != path:
+            self.paths[index] = last
+            self.indices[last] = index
@@ -1,4 +1,18 @@
+import math
 import random
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.instrumentation import instrument
+
+# The most messages rendered up front, beyond which each is rendered as it's drawn, so a large vocabulary costs memory per part rather than per combination
+MAX_TABLE_SIZE = 2**18
+
+# The most combinations which can be drawn as a single int64 index
+MAX_INDEX = 2**63 - 1
 
 commit_types = [
     "feat",
@@ -79,10 +93,142 @@ templates = [
 ]
 
 
-def generate_commit_message() -> str:
-    commit_type = random.choice(commit_types)
-    verb = random.choice(verbs)
-    noun = random.choice(nouns)
-    template = random.choice(templates)
+@instrument("generate_commit_message")
+def generate_commit_message(rng: Optional[random.Random] = None) -> str:
+    # Fall back to the shared module level generator when no seeded instance is given
+    rng = rng or random
+
+    commit_type = rng.choice(commit_types)
+    verb = rng.choice(verbs)
+    noun = rng.choice(nouns)
+    template = rng.choice(templates)
 
     return f"{commit_type}: {template.format(verb=verb, noun=noun)}"
+
+
+def load_vocabulary(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Load the words commit messages are built from.
+
+    Args:
+        path (Optional[str]): A YAML file with any of "commit_types", "verbs", "nouns" and "templates"
+            lists, anything missing uses the built in words. None uses only the built in words.
+            Templates may only use {verb} and {noun}.
+
+    Returns:
+        Dict[str, List[str]]: The words for each part of a message.
+    """
+    vocabulary = {
+        "commit_types": commit_types,
+        "verbs": verbs,
+        "nouns": nouns,
+        "templates": templates,
+    }
+
+    if path is None:
+        return vocabulary
+
+    import yaml
+
+    with open(path, "r") as file:
+        overrides = yaml.safe_load(file) or {}
+
+    if not isinstance(overrides, dict):
+        raise ValueError(f"Invalid vocabulary file {path}. Must be a mapping of {', '.join(vocabulary)} to lists")
+
+    for key, words in overrides.items():
+        if key not in vocabulary:
+            raise ValueError(f"Unknown vocabulary {key} in {path}. Must be one of {', '.join(vocabulary)}")
+
+        if not isinstance(words, list) or not words:
+            raise ValueError(f"Invalid vocabulary {key} in {path}. Must be a non-empty list")
+
+        vocabulary[key] = [str(word) for word in words]
+
+    # Checked now, rather than when the first message using it is drawn, by which time the repository exists
+    for template in vocabulary["templates"]:
+        try:
+            template.format(verb="", noun="")
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid template {template!r} in {path}. Must only use {{verb}} and {{noun}}") from e
+
+    return vocabulary
+
+
+class MessageTable(object):
+    """
+    Every combination of commit type, verb, noun and template, indexed in that order.
+
+    Small vocabularies, such as the built in words, are rendered once up front, so a repeated
+    message is the same interned string rather than a new one. Larger ones only keep each
+    part, rendering messages as they're drawn, as the combinations grow with the product
+    of the parts' sizes.
+
+    Methods:
+        draw(count: int, rng: np.random.Generator) -> List[str]:
+            Picks messages uniformly, the same as picking each part independently.
+    """
+
+    def __init__(self, words: Dict[str, List[str]]) -> None:
+        self.parts = [[sys.intern(word) for word in words[key]] for key in ("commit_types", "verbs", "nouns", "templates")]
+        self.sizes = tuple(len(part) for part in self.parts)
+        self.size = math.prod(self.sizes)
+
+        self.messages: Optional[List[str]] = None
+        if self.size <= MAX_TABLE_SIZE:
+            self.messages = [sys.intern(self._render(*index)) for index in np.ndindex(*self.sizes)]
+
+    def draw(self, count: int, rng: np.random.Generator) -> List[str]:
+        if self.size <= MAX_INDEX:
+            indices = rng.integers(0, self.size, size=count)
+
+            if self.messages is not None:
+                return [self.messages[i] for i in indices.tolist()]
+
+            parts = np.unravel_index(indices, self.sizes)
+        else:
+            # Too many combinations for one index, so each part is drawn on its own
+            parts = [rng.integers(0, size, size=count) for size in self.sizes]
+
+        return [self._render(*index) for index in zip(*(part.tolist() for part in parts))]
+
+    def _render(self, commit_type: int, verb: int, noun: int, template: int) -> str:
+        commit_types, verbs, nouns, templates = self.parts
+
+        return f"{commit_types[commit_type]}: {templates[template].format(verb=verbs[verb], noun=nouns[noun])}"
+
+
+@lru_cache(maxsize=None)
+def message_table(vocabulary: Optional[str] = None) -> MessageTable:
+    """
+    Index every possible commit message once.
+
+    Args:
+        vocabulary (Optional[str]): The vocabulary file to use, see load_vocabulary.
+
+    Returns:
+        MessageTable: Every combination of commit type, verb, noun and template.
+    """
+    return MessageTable(load_vocabulary(vocabulary))
+
+
+@instrument("generate_commit_messages")
+def generate_commit_messages(count: int, rng: Optional[np.random.Generator] = None, vocabulary: Optional[str] = None) -> List[str]:
+    """
+    Generate a batch of commit messages at once.
+
+    Every message is picked from the vocabulary's table, see MessageTable. Picking uniformly
+    from the table is the same as picking each part independently.
+
+    Args:
+        count (int): The number of messages to generate.
+        rng (Optional[np.random.Generator]): The random number generator to draw from.
+        vocabulary (Optional[str]): The vocabulary file to use, see load_vocabulary.
+
+    Returns:
+        List[str]: The commit messages.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    return message_table(vocabulary).draw(count, rng)
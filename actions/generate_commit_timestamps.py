@@ -1,85 +1,215 @@
 import datetime
-import random
-from typing import Generator
+from typing import Generator, List, Optional, Tuple, Union
 
+import numpy as np
 
-def generate_working_dates(from_date: datetime.date, to_date: datetime.date, min_days_per_week: int, max_days_per_week: int, include_weekends: bool) -> Generator[datetime.date, None, None]:
+from utils.instrumentation import instrument
+
+# Timestamps are converted to Python objects this many at a time when iterating a schedule
+SCHEDULE_CHUNK_SIZE = 65536
+
+
+class Schedule(object):
+    """
+    Commit timestamps held as one ascending int64 array of seconds since the epoch, in naive local time.
+
+    That's eight bytes a commit, with nothing allocated per commit until it's iterated, and
+    then only a chunk at a time. Iterating yields the seconds as ints, which every writer
+    takes in place of datetimes.
+
+    Methods:
+        between(from_date: datetime.date, to_date: datetime.date) -> Schedule:
+            Slices out the commits within a date range.
+
+        after(at: datetime.datetime) -> Schedule:
+            Slices out the commits after a timestamp.
+
+        counts_per_day() -> Tuple[np.ndarray, np.ndarray]:
+            Counts the commits on each day which has any.
+
+        chunks(size: int = SCHEDULE_CHUNK_SIZE) -> Generator[np.ndarray, None, None]:
+            Iterates over the seconds in arrays of at most the given size.
+
+        datetimes() -> Generator[datetime.datetime, None, None]:
+            Iterates over the timestamps as naive datetimes.
     """
-    Generate a sequence of working dates within a specified range.
+
+    def __init__(self, seconds: np.ndarray) -> None:
+        self.seconds = seconds
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, "Schedule"]:
+        if isinstance(index, slice):
+            return Schedule(self.seconds[index])
+
+        return int(self.seconds[index])
+
+    def __iter__(self) -> Generator[int, None, None]:
+        for chunk in self.chunks():
+            yield from chunk.tolist()
+
+    def between(self, from_date: datetime.date, to_date: datetime.date) -> "Schedule":
+        start, end = self.seconds.searchsorted(np.array([np.datetime64(from_date, "D"), np.datetime64(to_date, "D") + 1]).astype("datetime64[s]").astype(np.int64))
+
+        return self[start:end]
+
+    def after(self, at: datetime.datetime) -> "Schedule":
+        start = self.seconds.searchsorted(np.datetime64(at, "s").astype(np.int64), side="right")
+
+        return self[start:]
+
+    def counts_per_day(self) -> Tuple[np.ndarray, np.ndarray]:
+        # The seconds are naive local time, so whole days of them are local days
+        days, counts = np.unique(self.seconds // 86400, return_counts=True)
+
+        return days.astype("datetime64[D]"), counts
+
+    def chunks(self, size: int = SCHEDULE_CHUNK_SIZE) -> Generator[np.ndarray, None, None]:
+        for start in range(0, len(self.seconds), size):
+            end = start + size
+            yield self.seconds[start:end]
+
+    def datetimes(self) -> Generator[datetime.datetime, None, None]:
+        # numpy builds each chunk's datetimes in C, far quicker than converting one at a time
+        for chunk in self.chunks():
+            yield from chunk.astype("datetime64[s]").tolist()
+
+
+def schedule_working_dates(rng: np.random.Generator, from_date: datetime.date, to_date: datetime.date, min_days_per_week: int, max_days_per_week: int, include_weekends: bool) -> np.ndarray:
+    """
+    Choose every working date within a specified range in one pass.
 
     Args:
+        rng (np.random.Generator): The random number generator to draw from.
         from_date (datetime.date): The start date of the range.
         to_date (datetime.date): The end date of the range.
         min_days_per_week (int): Minimum number of working days per week.
         max_days_per_week (int): Maximum number of working days per week.
         include_weekends (bool): Whether to include weekends as valid working days.
 
-    Yields:
-        datetime.date: A date representing a working day.
+    Returns:
+        np.ndarray: The working days, as ascending datetime64[D] values.
     """
-    new_week = True
-    num_days_any_week = include_weekends and 7 or 5
-    num_days_this_week = 0
-    days_choice = []
+    dates = np.arange(np.datetime64(from_date, "D"), np.datetime64(to_date, "D") + 1)
+    if len(dates) == 0:
+        return dates
 
-    current_date = from_date
-    while current_date <= to_date:
-        # At the start of each week we want to recalculate our random sample
-        if current_date.weekday() == 0:
-            new_week = True
+    # The epoch was a Thursday, so shift by three to make Monday weekday 0
+    days = dates.astype(np.int64)
+    weekdays = (days + 3) % 7
 
-        if new_week:
-            # We chose a sample of a random amount from the valid days, weekends are excluded here if required
-            new_week = False
-            num_days_this_week = random.randint(min_days_per_week, min(max_days_per_week, num_days_any_week))
-            days_choice = random.sample(range(num_days_any_week), num_days_this_week)
+    # The range may start mid-week, that partial week still gets its own sample
+    weeks = (days - weekdays) // 7
+    weeks -= weeks[0]
+    num_weeks = int(weeks[-1]) + 1
 
-        # Skip any days we don't want to commit on
-        if current_date.weekday() not in days_choice:
-            current_date += datetime.timedelta(days=1)
-            continue
+    num_days_any_week = include_weekends and 7 or 5
+    num_days_per_week = rng.integers(min_days_per_week, min(max_days_per_week, num_days_any_week), size=num_weeks, endpoint=True)
+
+    # Ranking uniform keys gives each week a random permutation of its valid days, keep the first few of each
+    ranks = rng.random((num_weeks, num_days_any_week)).argsort(axis=1).argsort(axis=1)
+    chosen = np.zeros((num_weeks, 7), dtype=bool)
+    chosen[:, :num_days_any_week] = ranks < num_days_per_week[:, np.newaxis]
 
-        yield current_date
-        current_date += datetime.timedelta(days=1)
+    return dates[chosen[weeks, weekdays]]
 
 
-def generate_commit_times(min_per_day: int, max_per_day: int, include_out_of_hours: bool) -> Generator[datetime.time, None, None]:
+def schedule_commit_times(rng: np.random.Generator, num_days: int, min_per_day: int, max_per_day: int, include_out_of_hours: bool) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Generate a sequence of commit times for a single day.
+    Choose the commit times for a number of days in one pass.
 
     Args:
+        rng (np.random.Generator): The random number generator to draw from.
+        num_days (int): The number of days to choose commit times for.
         min_per_day (int): Minimum number of commits per day.
         max_per_day (int): Maximum number of commits per day.
         include_out_of_hours (bool): Whether to include times outside standard working hours.
 
-    Yields:
-        datetime.time: A time representing a commit.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The number of commits on each day, and the seconds
+        since midnight of every commit, grouped by day.
     """
     earliest_hour = include_out_of_hours and 0 or 9
     latest_hour = include_out_of_hours and 23 or 17
 
-    num_commits = random.randint(min_per_day, max_per_day)
-    commit_times = []
+    counts = rng.integers(min_per_day, max_per_day, size=num_days, endpoint=True)
+    num_commits = int(counts.sum())
 
-    for _ in range(num_commits):
-        # Generate a random time for the commit
-        commit_time = datetime.time(
-            # Dev's opinionated choice - focus commits around shortly after lunch
-            max(earliest_hour, min(int(random.gauss(14, 2)), latest_hour)),
-            random.randint(0, 59),
-            random.randint(0, 59),
-        )
+    # Dev's opinionated choice - focus commits around shortly after lunch
+    hours = np.clip(rng.normal(14, 2, num_commits).astype(np.int64), earliest_hour, latest_hour)
+    minutes = rng.integers(0, 59, size=num_commits, endpoint=True)
+    seconds = rng.integers(0, 59, size=num_commits, endpoint=True)
 
-        commit_times.append(commit_time)
+    return counts, hours * 3600 + minutes * 60 + seconds
 
-    # Sort the commit times to ensure they are in order
-    commit_times.sort()
 
-    for commit_time in commit_times:
-        yield commit_time
+def split_date_range(from_date: datetime.date, to_date: datetime.date, days: int) -> List[Tuple[datetime.date, datetime.date]]:
+    """
+    Split a date range into consecutive sub-ranges of roughly the given length.
+
+    Every sub-range after the first starts on a Monday, so each week's working days are
+    still chosen by a single sample and generating the sub-ranges separately keeps the
+    same rules as generating the whole range.
+
+    Args:
+        from_date (datetime.date): The start date of the range.
+        to_date (datetime.date): The end date of the range.
+        days (int): The length of each sub-range, rounded up to whole weeks.
+
+    Returns:
+        List[Tuple[datetime.date, datetime.date]]: The inclusive start and end date of each sub-range.
+    """
+    span = datetime.timedelta(weeks=max(1, -(-days // 7)))
 
+    # Anchor the sub-ranges on the Monday of the first week
+    start = from_date - datetime.timedelta(days=from_date.weekday())
+    ranges = []
 
-def generate_commit_timestamps(from_date: datetime.date, to_date: datetime.date, min_days_per_week: int, max_days_per_week: int, include_weekends: bool, min_per_day: int, max_per_day: int, include_out_of_hours: bool) -> Generator[datetime.datetime, None, None]:
+    while start <= to_date:
+        end = start + span
+        ranges.append((max(start, from_date), min(end - datetime.timedelta(days=1), to_date)))
+        start = end
+
+    return ranges
+
+
+@instrument("generate_commit_schedule")
+def generate_commit_schedule(from_date: datetime.date, to_date: datetime.date, min_days_per_week: int, max_days_per_week: int, include_weekends: bool, min_per_day: int, max_per_day: int, include_out_of_hours: bool, rng: Optional[np.random.Generator] = None) -> Schedule:
+    """
+    Generate every commit timestamp within a specified date range in one pass.
+
+    Args:
+        from_date (datetime.date): The start date of the range.
+        to_date (datetime.date): The end date of the range.
+        min_days_per_week (int): Minimum number of working days per week.
+        max_days_per_week (int): Maximum number of working days per week.
+        include_weekends (bool): Whether to include weekends as valid working days.
+        min_per_day (int): Minimum number of commits per day.
+        max_per_day (int): Maximum number of commits per day.
+        include_out_of_hours (bool): Whether to include times outside standard working hours.
+        rng (np.random.Generator, optional): The random number generator to draw from, seed it for a reproducible schedule.
+
+    Returns:
+        Schedule: The commit timestamps.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    dates = schedule_working_dates(rng, from_date, to_date, min_days_per_week, max_days_per_week, include_weekends)
+    counts, seconds = schedule_commit_times(rng, len(dates), min_per_day, max_per_day, include_out_of_hours)
+
+    timestamps = dates.astype("datetime64[s]").astype(np.int64).repeat(counts) + seconds
+
+    # Days never overlap, so one sort puts every day's commits in order
+    timestamps.sort()
+
+    return Schedule(timestamps)
+
+
+@instrument("generate_commit_timestamps")
+def generate_commit_timestamps(from_date: datetime.date, to_date: datetime.date, min_days_per_week: int, max_days_per_week: int, include_weekends: bool, min_per_day: int, max_per_day: int, include_out_of_hours: bool, rng: Optional[np.random.Generator] = None) -> Generator[datetime.datetime, None, None]:
     """
     Generate a sequence of commit timestamps within a specified date range.
 
@@ -92,10 +222,11 @@ def generate_commit_timestamps(from_date: datetime.date, to_date: datetime.date,
         min_per_day (int): Minimum number of commits per day.
         max_per_day (int): Maximum number of commits per day.
         include_out_of_hours (bool): Whether to include times outside standard working hours.
+        rng (np.random.Generator, optional): The random number generator to draw from, seed it for a reproducible schedule.
 
     Yields:
         datetime.datetime: A timestamp representing a commit.
     """
-    for date in generate_working_dates(from_date, to_date, min_days_per_week, max_days_per_week, include_weekends):
-        for time in generate_commit_times(min_per_day, max_per_day, include_out_of_hours):
-            yield datetime.datetime.combine(date, time)
+    schedule = generate_commit_schedule(from_date, to_date, min_days_per_week, max_days_per_week, include_weekends, min_per_day, max_per_day, include_out_of_hours, rng)
+
+    yield from schedule.datetimes()
@@ -0,0 +1,135 @@
+import datetime
+import os
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from actions.create_repo import create_repo
+from actions.generate_churn import Churn
+from actions.generate_topology import Topology
+from actions.generate_commit_message import generate_commit_messages
+from actions.generate_commit_timestamps import generate_commit_schedule, split_date_range
+from git.objects import ObjectStoreGit, serialize_commit_tails
+from utils.instrumentation import instrumentation
+
+
+def prepare_shard(identity: bytes, from_date: datetime.date, to_date: datetime.date, schedule: Dict[str, Any], seed: np.random.SeedSequence, vocabulary: Optional[str] = None, after: Optional[datetime.datetime] = None) -> Tuple[Optional[datetime.datetime], List[bytes]]:
+    """
+    Plan and serialize every commit within one shard of the history.
+
+    Args:
+        identity (bytes): The "Name <email>" identity the commits are attributed to.
+        from_date (datetime.date): The start date of the shard.
+        to_date (datetime.date): The end date of the shard.
+        schedule (Dict[str, Any]): The remaining keyword arguments of generate_commit_schedule.
+        seed (np.random.SeedSequence): The seed for this shard's random number generators.
+        vocabulary (str, optional): The vocabulary file to build messages from, see load_vocabulary.
+        after (datetime.datetime, optional): Only plan commits after this timestamp.
+
+    Returns:
+        Tuple[Optional[datetime.datetime], List[bytes]]: The timestamp of the shard's first commit, if it
+        has any, and the serialized tail of every commit, see serialize_commit_tail.
+    """
+    timestamp_seed, message_seed = seed.spawn(2)
+
+    timestamps = generate_commit_schedule(from_date, to_date, rng=np.random.default_rng(timestamp_seed), **schedule)
+    if after is not None:
+        timestamps = timestamps.after(after)
+
+    messages = generate_commit_messages(len(timestamps), np.random.default_rng(message_seed), vocabulary)
+
+    # Signatures are formatted straight from the schedule's seconds, without a datetime per commit
+    tails = serialize_commit_tails(identity, timestamps, messages)
+
+    return next(timestamps[:1].datetimes(), None), tails
+
+
+def generate_sharded_history(git: ObjectStoreGit, name: str, directory: str, from_date: datetime.date, to_date: datetime.date, shards: int, seed: int, vocabulary: Optional[str] = None, after: Optional[datetime.datetime] = None, worktree: bool = True, churn: Optional[Churn] = None, topology: Optional[Topology] = None, **schedule: Any) -> int:
+    """
+    Generate a repository's history by planning shards of the date range in parallel.
+
+    Each worker process plans the timestamps and messages of one shard and serializes
+    everything but the tree and parent of its commits. The shards are then linked into
+    one chain, hashed and written in order.
+
+    Only as many shards as there are workers are planned ahead of the one being written,
+    so at most that many shards' commits are held at once however many shards there are.
+
+    Args:
+        git (ObjectStoreGit): The object store writer to commit with.
+        name (str): The name of the new repository.
+        directory (str): The directory where the repository will be created.
+        from_date (datetime.date): The start date of the range.
+        to_date (datetime.date): The end date of the range.
+        shards (int): The number of shards to split the range into.
+        seed (int): The seed every shard's random number generators are derived from.
+        vocabulary (str, optional): The vocabulary file to build messages from, see load_vocabulary.
+        after (datetime.datetime, optional): Extend an existing history with commits after this timestamp
+            rather than creating the repository.
+        worktree (bool): Whether to check the templates out when creating the repository, see create_repo.
+        churn (Churn, optional): Changes files in every commit after the initial one, rather than committing empty.
+        topology (Topology, optional): Spreads the commits after the initial one over feature branches and merges.
+        **schedule (Any): The remaining keyword arguments of generate_commit_schedule.
+
+    Returns:
+        int: The number of commits written.
+    """
+    # Imported here as multiprocessing is slow to import, and most runs aren't sharded
+    from concurrent.futures import ProcessPoolExecutor
+
+    days = (to_date - from_date).days + 1
+    ranges = split_date_range(from_date, to_date, -(-days // shards))
+    seeds = np.random.SeedSequence(seed).spawn(len(ranges))
+
+    # When extending, the repository already has its initial commit
+    initial_commit = after is None
+    count = 0
+
+    workers = min(len(ranges), os.cpu_count() or 1)
+    shards_left = iter(zip(ranges, seeds))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def submit() -> None:
+            shard = next(shards_left, None)
+            if shard is not None:
+                (start, end), shard_seed = shard
+                pending.append((end, executor.submit(prepare_shard, git.identity, start, end, schedule, shard_seed, vocabulary, after)))
+
+        for _ in range(workers):
+            submit()
+
+        # Taken in date order, so parents can be linked as they arrive
+        while pending:
+            end, future = pending.popleft()
+            first_timestamp, tails = future.result()
+
+            # Another shard is planned while this one is written
+            submit()
+
+            if initial_commit:
+                if first_timestamp is None:
+                    continue
+
+                # The first planned commit becomes the initial commit of the templates instead
+                create_repo(git, name, directory, first_timestamp, worktree)
+                initial_commit = False
+                tails = tails[1:]
+                count += 1
+
+            for tail in tails:
+                if churn is not None:
+                    churn.advance()
+
+                if topology is not None:
+                    git.commit_serialized(tail, *topology.place())
+                else:
+                    git.commit_serialized(tail)
+
+            # Shards are planned in other processes, so progress is only known a shard at a time
+            count += len(tails)
+            instrumentation.advance(datetime.datetime.combine(end, datetime.time.max), len(tails))
+
+    return count
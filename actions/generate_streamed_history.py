@@ -0,0 +1,220 @@
+import datetime
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from actions.checkpoint import restore_refs, write_checkpoint
+from actions.create_repo import create_repo
+from actions.generate_churn import Churn
+from actions.generate_commit_message import generate_commit_messages
+from actions.generate_commit_timestamps import Schedule, generate_commit_schedule, split_date_range
+from actions.generate_topology import Topology
+from git.git import Git
+from git.objects import ObjectStoreGit, serialize_commit_tails
+from utils.instrumentation import instrumentation, peak_rss
+from utils.pipeline import pipelined
+
+# The longest chunk of the date range planned at once, rounded up to whole weeks
+STREAM_CHUNK_DAYS = 28
+
+# Busier schedules get shorter chunks, so a chunk holds at most about this many commits
+STREAM_CHUNK_COMMITS = 16384
+
+# Chunks each stage may run ahead of the next
+QUEUE_DEPTH = 2
+
+# Whatever is already in use, the writer always gets at least this much
+MIN_BUDGET = 16 * 2**20
+
+
+def chunk_days(max_per_day: int) -> int:
+    """
+    Choose how many days to plan at once, so a chunk holds about STREAM_CHUNK_COMMITS commits at most.
+
+    The chunks only depend on the schedule, never on the memory available, so the same
+    seed always streams the same history.
+
+    Args:
+        max_per_day (int): Maximum number of commits per day.
+
+    Returns:
+        int: The days per chunk, at most STREAM_CHUNK_DAYS and at least one.
+    """
+    return max(1, min(STREAM_CHUNK_DAYS, STREAM_CHUNK_COMMITS // max(1, max_per_day)))
+
+
+def generate_streamed_history(git: Git, name: str, directory: str, from_date: datetime.date, to_date: datetime.date, memory_limit: int, timestamp_rng: np.random.Generator, message_rng: np.random.Generator, vocabulary: Optional[str] = None, after: Optional[datetime.datetime] = None, worktree: bool = True, churn: Optional[Churn] = None, topology: Optional[Topology] = None, checkpoint: int = 0, key: str = "", resume: Optional[Dict[str, Any]] = None, **schedule: Any) -> int:
+    """
+    Generate a repository's history a chunk of the date range at a time, keeping the peak memory flat however long the range.
+
+    Planning, rendering and writing each run in their own thread, handing chunks over through
+    bounded queues so no stage can run more than QUEUE_DEPTH chunks ahead of the next. Chunks
+    are shrunk from STREAM_CHUNK_DAYS for busy schedules, and the writer is flushed whenever
+    what it holds on to outgrows half of what the limit leaves, see Git.flush.
+
+    So memory still grows with the range until the writer is first flushed, then stays flat: a
+    short range peaks well under the limit, a long one close to it. The limit can't be kept to
+    when what's already in use leaves less than MIN_BUDGET of it.
+
+    Each chunk's timestamps are drawn from the generators in turn, so a seed gives a different
+    history than generating the whole range at once, but always the same streamed one.
+
+    Chunk boundaries are also where checkpoints are made, flushing the writer then recording the
+    generators' states, the refs and the next chunk. Resuming from one carries on from that chunk,
+    with the same generator states, so gives exactly the history an uninterrupted run would have.
+    The one exception is the checkpoint made right after the initial commit, so a run dying before
+    its first boundary can be resumed too, which replans that commit's chunk and skips past it.
+
+    Args:
+        git (Git): The writer to commit with.
+        name (str): The name of the new repository.
+        directory (str): The directory where the repository will be created.
+        from_date (datetime.date): The start date of the range.
+        to_date (datetime.date): The end date of the range.
+        memory_limit (int): The peak RSS in bytes to stay within, including what's already in use, or 0 for no limit.
+        timestamp_rng (np.random.Generator): The random number generator for the timestamps.
+        message_rng (np.random.Generator): The random number generator for the messages.
+        vocabulary (str, optional): The vocabulary file to build messages from, see load_vocabulary.
+        after (datetime.datetime, optional): Extend an existing history with commits after this timestamp
+            rather than creating the repository.
+        worktree (bool): Whether to check the templates out when creating the repository, see create_repo.
+        churn (Churn, optional): Changes files in every commit after the initial one, rather than committing empty.
+        topology (Topology, optional): Spreads the commits after the initial one over feature branches and merges.
+        checkpoint (int): Make a checkpoint after the initial commit, then at the first chunk boundary after every this many commits, or 0 to never.
+        key (str): The key of the parameters which shape the history, recorded in checkpoints, see read_checkpoint.
+        resume (Dict[str, Any], optional): The checkpoint to carry on from, replacing from_date and after.
+        **schedule (Any): The remaining keyword arguments of generate_commit_schedule.
+
+    Returns:
+        int: The number of commits written.
+    """
+    # The interpreter, numpy and anything loaded so far are out of the budget's hands
+    budget = memory_limit and max(memory_limit - peak_rss(), MIN_BUDGET) or None
+
+    # The object store writers take commits already serialized, the others a timestamp and message each
+    serialized = isinstance(git, ObjectStoreGit)
+
+    first_chunk = 0
+    skip = 0
+    total = 0
+    last_timestamp = None
+
+    if resume is not None:
+        # The range and tip as the interrupted run saw them, rather than as the repository looks now
+        from_date = datetime.date.fromisoformat(resume["from_date"])
+        after = resume["after"] and datetime.datetime.fromisoformat(resume["after"])
+        first_chunk = resume["chunk"]
+        skip = resume["skip"]
+        total = resume["commits"]
+        last_timestamp = resume["timestamp"] and datetime.datetime.fromisoformat(resume["timestamp"])
+
+        restore_refs(git, resume["refs"], resume["tree"])
+        timestamp_rng.bit_generator.state = resume["rngs"]["timestamp"]
+        message_rng.bit_generator.state = resume["rngs"]["message"]
+
+        if churn is not None:
+            churn.restore(resume["churn"])
+
+        if topology is not None:
+            topology.restore(resume["topology"], resume["refs"])
+
+    ranges = split_date_range(from_date, to_date, chunk_days(schedule["max_per_day"]))
+
+    def plan() -> Generator[Tuple[int, datetime.date, Schedule, List[str], Dict[str, Any]], None, None]:
+        for index, (start, end) in enumerate(ranges[first_chunk:], first_chunk):
+            timestamps = generate_commit_schedule(start, end, rng=timestamp_rng, **schedule)
+            if after is not None:
+                timestamps = timestamps.after(after)
+
+            messages = generate_commit_messages(len(timestamps), message_rng, vocabulary)
+
+            # Planning runs ahead of writing, so the states a checkpoint needs are taken with the chunk
+            yield index, end, timestamps, messages, {"timestamp": timestamp_rng.bit_generator.state, "message": message_rng.bit_generator.state}
+
+    def render(planned: Iterable[Tuple[int, datetime.date, Schedule, List[str], Dict[str, Any]]]) -> Generator[Tuple[int, datetime.date, Optional[datetime.datetime], Optional[datetime.datetime], list, Dict[str, Any]], None, None]:
+        for index, end, timestamps, messages, states in planned:
+            if serialized:
+                commits = serialize_commit_tails(git.identity, timestamps, messages)
+            else:
+                commits = list(zip(timestamps, messages))
+
+            yield index, end, next(timestamps[:1].datetimes(), None), next(timestamps[-1:].datetimes(), None), commits, states
+
+    def save(chunk: int, skipped: int, states: Dict[str, Any]) -> None:
+        # Everything the checkpoint points at has to be on disk first
+        git.flush()
+
+        write_checkpoint(
+            directory,
+            {
+                "key": key,
+                "from_date": from_date.isoformat(),
+                "after": after and after.isoformat(),
+                "chunk": chunk,
+                "skip": skipped,
+                "commits": total + count,
+                "timestamp": last_timestamp and last_timestamp.isoformat(),
+                "tip": git.head(),
+                "refs": git.current_refs(),
+                "tree": serialized and git.tree or None,
+                "rngs": states,
+                "churn": churn and churn.state(),
+                "topology": topology and topology.state(),
+            },
+        )
+
+    # When extending or resuming, the repository already has its initial commit
+    initial_commit = after is None and resume is None
+    count = 0
+    since_checkpoint = 0
+
+    # The generators' states before the chunk being written, as planning runs ahead
+    chunk_states = {"timestamp": timestamp_rng.bit_generator.state, "message": message_rng.bit_generator.state}
+
+    for index, end, first_timestamp, chunk_last_timestamp, commits, states in pipelined(render(pipelined(plan(), QUEUE_DEPTH)), QUEUE_DEPTH):
+        before, chunk_states = chunk_states, states
+
+        if skip:
+            # Resuming part way through this chunk, from just after the initial commit
+            commits = commits[skip:]
+            skip = 0
+
+        if initial_commit:
+            if first_timestamp is None:
+                continue
+
+            # The first planned commit becomes the initial commit of the templates instead
+            create_repo(git, name, directory, first_timestamp, worktree)
+            initial_commit = False
+            commits = commits[1:]
+            count += 1
+            last_timestamp = first_timestamp
+
+            if checkpoint:
+                # Replanning this chunk from its starting states and skipping the initial commit carries on from here
+                save(index, 1, before)
+
+        for commit in commits:
+            if churn is not None:
+                churn.advance()
+
+            placement = topology is not None and topology.place() or ()
+
+            if serialized:
+                git.commit_serialized(commit, *placement)
+            else:
+                git.commit(*commit, *placement)
+
+        count += len(commits)
+        since_checkpoint += len(commits)
+        last_timestamp = chunk_last_timestamp or last_timestamp
+        instrumentation.advance(datetime.datetime.combine(end, datetime.time.max), len(commits))
+
+        # Past the initial commit, only at chunk boundaries, so neither a flush nor a checkpoint ever splits a chunk
+        if checkpoint and since_checkpoint >= checkpoint and not initial_commit:
+            save(index + 1, 0, states)
+            since_checkpoint = 0
+        elif budget is not None and git.buffered_bytes() > budget // 2:
+            git.flush()
+
+    return count
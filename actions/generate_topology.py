@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from git.objects import ObjectStoreGit
+from utils.instrumentation import instrument
+
+# Feature branches are created under this prefix, numbered in the order they fork
+BRANCH_PREFIX = "refs/heads/feature/"
+
+
+class Topology(object):
+    """
+    Spreads commits over feature branches which fork from the main branch and merge back into it.
+
+    A fixed number of feature branches are kept open, each forking from the tip of the
+    main branch and living for a geometrically distributed number of commits. Every commit
+    goes to the main branch or one of the open feature branches at random. Finished
+    branches wait until a main branch commit merges them, all together as an octopus
+    merge when more than one has finished. Branches still open at the end are left as refs.
+
+    Methods:
+        place() -> Tuple[List[int], str]:
+            Chooses the parents and ref of the next commit, to pass on to the writer.
+
+        state() -> Dict[str, Any]:
+            Records the open and finished branches, for a checkpoint.
+
+        restore(state: Dict[str, Any], refs: Dict[str, str]) -> None:
+            Carries on from a checkpoint, given where every ref was.
+    """
+
+    def __init__(self, git: ObjectStoreGit, rng: np.random.Generator, branches: int, lifetime: int, merge_probability: float) -> None:
+        self.git = git
+        self.rng = rng
+        self.branches = branches
+        self.lifetime = lifetime
+        self.merge_probability = merge_probability
+        self.open: List[List] = []
+        self.finished: List[str] = []
+        self.next_branch = None
+
+    @instrument("topology")
+    def place(self) -> Tuple[List[int], str]:
+        self.git.begin()
+        refs = self.git.graph.refs
+        main = self.git.ref
+
+        if self.next_branch is None:
+            # Branches left open by an earlier run are finished off by merging them, and never reused
+            existing = self.git.list_refs(BRANCH_PREFIX)
+            for ref, object_id in sorted(existing.items()):
+                # Recorded as already on disk, so the writer deletes them once they're merged
+                refs[ref] = self.git.published[ref] = self.git.graph.add_existing(object_id)
+                self.finished.append(ref)
+
+            self.next_branch = max([int(ref.removeprefix(BRANCH_PREFIX)) + 1 for ref in existing if ref.removeprefix(BRANCH_PREFIX).isdigit()], default=0)
+
+        # Keep the branches topped up, each forking from wherever the main branch is now
+        while len(self.open) < self.branches:
+            ref = f"{BRANCH_PREFIX}{self.next_branch:06d}"
+            self.next_branch += 1
+
+            refs[ref] = refs[main]
+            self.open.append([ref, int(self.rng.geometric(1 / self.lifetime))])
+
+        line = int(self.rng.integers(len(self.open) + 1))
+
+        if line < len(self.open):
+            branch = self.open[line]
+            branch[1] -= 1
+
+            # Out of commits, so it waits to be merged
+            if branch[1] == 0:
+                self.open.pop(line)
+                self.finished.append(branch[0])
+
+            return [refs[branch[0]]], branch[0]
+
+        parents = [refs[main]]
+
+        if self.finished and self.rng.random() < self.merge_probability:
+            # Merged branches are deleted, the same as after a pull request
+            parents.extend(refs.pop(ref) for ref in self.finished)
+            self.finished = []
+
+        return parents, main
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "rng": self.rng.bit_generator.state,
+            "open": self.open,
+            "finished": self.finished,
+            "next_branch": self.next_branch,
+        }
+
+    def restore(self, state: Dict[str, Any], refs: Dict[str, str]) -> None:
+        self.rng.bit_generator.state = state["rng"]
+        self.open = [list(branch) for branch in state["open"]]
+        self.finished = list(state["finished"])
+        self.next_branch = state["next_branch"]
+
+        # Already on disk, so recorded as published, the same as they were when the checkpoint was made
+        self.git.begin()
+        for ref in [branch[0] for branch in self.open] + self.finished:
+            self.git.graph.refs[ref] = self.git.published[ref] = self.git.graph.add_existing(refs[ref])
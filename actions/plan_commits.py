@@ -0,0 +1,181 @@
+import datetime
+import json
+from typing import Generator, Iterable, Optional, Tuple
+
+import numpy as np
+
+from actions.create_repo import INITIAL_COMMIT_MESSAGE
+from actions.generate_commit_message import generate_commit_messages
+from actions.generate_commit_timestamps import generate_commit_schedule
+from git.dates import from_seconds, to_seconds
+
+# Rows per record batch when streaming Arrow and Parquet plans
+PLAN_BATCH_SIZE = 65536
+
+# Messages generated at a time while planning
+MESSAGE_BATCH_SIZE = 4096
+
+
+def plan_commits(from_date: datetime.date, to_date: datetime.date, min_days_per_week: int, max_days_per_week: int, include_weekends: bool, min_per_day: int, max_per_day: int, include_out_of_hours: bool, timestamp_rng: Optional[np.random.Generator] = None, message_rng: Optional[np.random.Generator] = None, vocabulary: Optional[str] = None, after: Optional[datetime.datetime] = None) -> Generator[Tuple[int, str], None, None]:
+    """
+    Plan the timestamp and message of every commit within a specified date range.
+
+    Timestamps are the Schedule's naive local seconds since the epoch, which every writer
+    takes as is, so nothing is built per commit beyond the int itself.
+
+    Args:
+        from_date (datetime.date): The start date of the range.
+        to_date (datetime.date): The end date of the range.
+        min_days_per_week (int): Minimum number of working days per week.
+        max_days_per_week (int): Maximum number of working days per week.
+        include_weekends (bool): Whether to include weekends as valid working days.
+        min_per_day (int): Minimum number of commits per day.
+        max_per_day (int): Maximum number of commits per day.
+        include_out_of_hours (bool): Whether to include times outside standard working hours.
+        timestamp_rng (np.random.Generator, optional): The random number generator for the timestamps.
+        message_rng (np.random.Generator, optional): The random number generator for the messages.
+        vocabulary (str, optional): The vocabulary file to build messages from, see load_vocabulary.
+        after (datetime.datetime, optional): Only plan commits after this timestamp, extending an
+            existing history rather than starting with an initial commit.
+
+    Yields:
+        Tuple[int, str]: The timestamp, in seconds, and message of a commit.
+    """
+    initial_commit = after is None
+    messages = iter(())
+
+    schedule = generate_commit_schedule(
+        from_date,
+        to_date,
+        min_days_per_week=min_days_per_week,
+        max_days_per_week=max_days_per_week,
+        include_weekends=include_weekends,
+        min_per_day=min_per_day,
+        max_per_day=max_per_day,
+        include_out_of_hours=include_out_of_hours,
+        rng=timestamp_rng,
+    )
+
+    if after is not None:
+        schedule = schedule.after(after)
+
+    for commit_timestamp in schedule:
+        if initial_commit:
+            initial_commit = False
+            yield commit_timestamp, INITIAL_COMMIT_MESSAGE
+        else:
+            message = next(messages, None)
+            if message is None:
+                messages = iter(generate_commit_messages(MESSAGE_BATCH_SIZE, message_rng, vocabulary))
+                message = next(messages)
+
+            yield commit_timestamp, message
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Arrow and Parquet plans need pyarrow to be installed") from e
+
+    return pyarrow
+
+
+def _plan_format(path: str) -> str:
+    for extension, plan_format in [(".jsonl", "jsonl"), (".parquet", "parquet"), (".arrow", "arrow")]:
+        if path.endswith(extension):
+            return plan_format
+
+    raise ValueError(f"Unknown plan format for {path}. Must end in .jsonl, .parquet or .arrow")
+
+
+def _batches(plan: Iterable[Tuple[int, str]]) -> Generator[Tuple[list, list], None, None]:
+    timestamps, messages = [], []
+
+    for at, message in plan:
+        timestamps.append(at)
+        messages.append(message)
+
+        if len(timestamps) == PLAN_BATCH_SIZE:
+            yield timestamps, messages
+            timestamps, messages = [], []
+
+    if timestamps:
+        yield timestamps, messages
+
+
+def write_plan(path: str, plan: Iterable[Tuple[int, str]]) -> int:
+    """
+    Stream a commit plan to a file, JSONL, Parquet or Arrow depending on its extension.
+
+    Args:
+        path (str): The file to write, ending in .jsonl, .parquet or .arrow.
+        plan (Iterable[Tuple[int, str]]): The timestamp, in seconds, and message of every commit.
+
+    Returns:
+        int: The number of commits written.
+    """
+    plan_format = _plan_format(path)
+    count = 0
+
+    if plan_format == "jsonl":
+        with open(path, "w") as f:
+            for at, message in plan:
+                # Readable timestamps, so a plan can be edited by hand
+                f.write(json.dumps({"at": from_seconds(at).isoformat(), "message": message}) + "\n")
+                count += 1
+
+        return count
+
+    pyarrow = _import_pyarrow()
+    schema = pyarrow.schema([("at", pyarrow.timestamp("s")), ("message", pyarrow.string())])
+
+    if plan_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pyarrow.ipc.new_file(path, schema)
+
+    try:
+        for timestamps, messages in _batches(plan):
+            writer.write_batch(pyarrow.record_batch([timestamps, messages], schema=schema))
+            count += len(timestamps)
+    finally:
+        writer.close()
+
+    return count
+
+
+def read_plan(path: str) -> Generator[Tuple[int, str], None, None]:
+    """
+    Stream a commit plan back from a file written by write_plan, one batch at a time.
+
+    Args:
+        path (str): The file to read, ending in .jsonl, .parquet or .arrow.
+
+    Yields:
+        Tuple[int, str]: The timestamp, in seconds, and message of a commit.
+    """
+    plan_format = _plan_format(path)
+
+    if plan_format == "jsonl":
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield to_seconds(datetime.datetime.fromisoformat(entry["at"])), entry["message"]
+
+        return
+
+    pyarrow = _import_pyarrow()
+
+    if plan_format == "parquet":
+        batches = pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=PLAN_BATCH_SIZE)
+    else:
+        reader = pyarrow.ipc.open_file(pyarrow.memory_map(path, "r"))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    for batch in batches:
+        # Parquet has no second timestamps, so they come back as milliseconds unless cast back first
+        yield from zip(batch.column("at").cast(pyarrow.timestamp("s")).cast(pyarrow.int64()).to_pylist(), batch.column("message").to_pylist())
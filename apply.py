@@ -0,0 +1,60 @@
+import click
+
+import utils.options as options
+import utils.parsing as parsing
+from actions.apply_commits import apply_commits
+from git.backends import create_git
+from utils.parameters import RunSpec
+from utils.staging import staged
+
+
+@click.command()
+@click.argument("plan", type=click.Path(exists=True, dir_okay=False))
+@options.APPLY.options
+def apply(plan: str, spec: RunSpec) -> None:
+    """
+    Stream a commit plan written by plan.py into a repository.
+
+    The first planned commit creates the repository from the templates, unless
+    extending, in which case only the planned commits after the current tip are written.
+    """
+    parsing.check_directory(spec.directory, existing=spec.extend)
+
+    # Imported once the parameters are checked, as numpy is the slowest part of starting up
+    from actions.plan_commits import read_plan
+
+    # Built in the staging directory when there is one, only appearing in place once it's finished
+    with staged(spec.directory, spec.staging_directory) as directory:
+        # Initialise git object
+        git = create_git(
+            spec.backend,
+            spec.username,
+            spec.email,
+            spec.name,
+            directory,
+            spec.reflog,
+        )
+
+        after = None
+        if spec.extend:
+            after = git.head_timestamp()
+            if after is None:
+                raise click.BadParameter("Invalid directory. The repository to extend has no commits")
+
+        count = apply_commits(git, spec.name, directory, read_plan(plan), after, spec.worktree)
+
+        # Flush anything the backend is still holding on to
+        git.close()
+
+        # So the generated history is fast to query without waiting for maintenance
+        if spec.commit_graph:
+            git.write_commit_graph()
+
+        if spec.bitmaps:
+            git.write_bitmaps()
+
+    click.echo(f"Applied {count} commits to {spec.directory}")
+
+
+if __name__ == "__main__":
+    apply()
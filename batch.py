@@ -0,0 +1,190 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import click
+
+import main
+import utils.options as options
+import utils.parsing as parsing
+from utils.config import load_config
+from utils.parameters import RunSpec
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+def generate_repository(values: Dict[str, Any]) -> Optional[str]:
+    """
+    Generate a single repository from its already resolved parameters.
+
+    Args:
+        values (Dict[str, Any]): Every parameter of main, see RunSpec.as_dict.
+
+    Returns:
+        Optional[str]: None on success, otherwise a description of the failure.
+    """
+    try:
+        # Everything was resolved before the repository was handed out, so this only checks it again
+        main.run(options.MAIN.build(**values))
+    except Exception as e:
+        return str(e) or type(e).__name__
+
+    return None
+
+
+async def generate_repository_async(spec: RunSpec, semaphore: "asyncio.Semaphore") -> Optional[str]:
+    """
+    Generate a single repository through the asyncio git backend.
+
+    Args:
+        spec (RunSpec): The resolved parameters of main for this repository.
+        semaphore (asyncio.Semaphore): Bounds the git processes in flight across every repository.
+
+    Returns:
+        Optional[str]: None on success, otherwise a description of the failure.
+    """
+    # Only the async driver needs these, so they're left out of starting up
+    from actions.apply_commits import apply_commits_async
+    from git.async_git import AsyncGit
+
+    try:
+        parsing.check_directory(spec.directory, existing=spec.extend)
+
+        git = AsyncGit(spec.username, spec.email, spec.name, spec.directory, semaphore)
+
+        # When extending, only generate the days after the current tip
+        after = None
+        from_date = spec.from_date
+        if spec.extend:
+            after = await git.head_timestamp()
+            if after is None:
+                raise click.BadParameter("Invalid directory. The repository to extend has no commits")
+
+            from_date = options.extended_from_date(from_date, spec.to_date, after)
+
+        # Imported once it's needed, as numpy is the slowest part of starting up
+        import numpy as np
+
+        from actions.plan_commits import plan_commits
+
+        # Seeded the same way as main
+        timestamp_seed, message_seed = np.random.SeedSequence(spec.seed).spawn(2)
+
+        plan = plan_commits(
+            from_date,
+            spec.to_date,
+            min_days_per_week=spec.min_days_per_week,
+            max_days_per_week=spec.max_days_per_week,
+            include_weekends=spec.include_weekends,
+            min_per_day=spec.min_per_day,
+            max_per_day=spec.max_per_day,
+            include_out_of_hours=spec.include_out_of_hours,
+            timestamp_rng=np.random.default_rng(timestamp_seed),
+            message_rng=np.random.default_rng(message_seed),
+            vocabulary=spec.vocabulary,
+            after=after,
+        )
+
+        # Commits within the repository stay in order, other repositories progress while each one waits
+        await apply_commits_async(git, spec.name, spec.directory, plan, after)
+        await git.close()
+    except Exception as e:
+        return str(e) or type(e).__name__
+
+    return None
+
+
+async def generate_repositories_async(specs: List[Tuple[Dict[str, Any], RunSpec]], max_processes: int, report: Callable[[Dict[str, Any], Optional[str]], None]) -> None:
+    """
+    Generate every repository from one event loop, sharing a bound on in-flight git processes.
+
+    Args:
+        specs (List[Tuple[Dict[str, Any], RunSpec]]): The parameter overrides of each repository, with its resolved parameters.
+        max_processes (int): The maximum number of git processes running at once.
+        report (Callable[[Dict[str, Any], Optional[str]], None]): Called with each repository and its error, as it finishes.
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max_processes)
+
+    async def generate(repository: Dict[str, Any], spec: RunSpec) -> None:
+        report(repository, await generate_repository_async(spec, semaphore))
+
+    await asyncio.gather(*(generate(repository, spec) for repository, spec in specs))
+
+
+@click.command()
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option("--workers", help="the maximum number of repositories to generate at once", type=click.IntRange(min=1), default=os.cpu_count())
+@click.option("--driver", help="generate in worker processes, or from one asyncio event loop through the subprocess git backend", type=click.Choice(["process", "async"]), default="process")
+@click.option("--max-processes", help="with the async driver, the maximum number of git processes running at once", type=click.IntRange(min=1), default=os.cpu_count())
+def batch(manifest: str, workers: int, driver: str, max_processes: int) -> None:
+    """
+    Generate every repository listed in MANIFEST concurrently.
+
+    The manifest is a YAML file with a "repositories" list, each entry overriding
+    any of the parameters of main, and optional "defaults" shared by every entry.
+    Anything not set falls back to .config.yaml, then its default, as repositories
+    are generated in worker processes which can't prompt. Every entry is checked
+    before any repository is generated.
+
+    The async driver instead runs every repository from one event loop with the
+    asyncio git backend, ignoring backend, shards, worktree, churn, branches, memory_limit, checkpoint, resume, commit_graph, bitmaps, reflog, staging, caching and progress.
+    """
+    # Imported here, as --help needn't pay for it
+    import yaml
+
+    with open(manifest, "r") as file:
+        data = yaml.safe_load(file) or {}
+
+    defaults = data.get("defaults") or {}
+    repositories = [{**defaults, **repository} for repository in data.get("repositories") or []]
+
+    # Read once, with each value parsed once however many repositories fall back to it
+    config = load_config()
+    failures = 0
+
+    def report(repository: Dict[str, Any], error: Optional[str]) -> None:
+        nonlocal failures
+
+        directory = repository.get("directory", config["directory"])
+
+        if error is None:
+            click.echo(f"ok      {directory}")
+        else:
+            failures += 1
+            click.echo(f"failed  {directory}: {error}", err=True)
+
+    # Every repository is resolved and checked up front, so a bad entry fails before anything is generated for it
+    specs = []
+    for repository in repositories:
+        try:
+            specs.append((repository, options.MAIN.build(config, False, **repository)))
+        except Exception as e:
+            report(repository, str(e) or type(e).__name__)
+
+    if driver == "async":
+        import asyncio
+
+        asyncio.run(generate_repositories_async(specs, max_processes, report))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(generate_repository, spec.as_dict()): repository for repository, spec in specs}
+
+            for future in as_completed(futures):
+                try:
+                    error = future.result()
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+
+                report(futures[future], error)
+
+    click.echo(f"{len(repositories) - failures}/{len(repositories)} repositories generated")
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    batch()
@@ -0,0 +1,305 @@
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List
+
+import click
+import numpy as np
+
+from actions.create_repo import create_repo, render_templates
+from actions.generate_commit_message import generate_commit_message, generate_commit_messages
+from actions.generate_commit_timestamps import generate_commit_schedule, generate_commit_timestamps
+from git.backends import BACKENDS, create_git
+from utils.instrumentation import peak_rss
+
+# Latencies are measured over chunks of this many items, timing every single item would swamp the cheap stages
+CHUNK_SIZE = 1000
+
+# The mean cold start of main.py --help to fail over, numpy, asyncio and yaml must stay out of it, see tests/test_startup.py
+STARTUP_BUDGET_MS = 250
+
+# Commits on every day of the streamed workloads
+STREAM_PER_DAY = 50
+
+
+def workload(commits: int) -> Dict[str, Any]:
+    """
+    Build generate_commit_timestamps arguments which produce at least the given number of commits.
+
+    Every day is a working day with the same number of commits, so the count is exact
+    whenever it's a multiple of the commits per day.
+
+    Args:
+        commits (int): The number of commits wanted.
+
+    Returns:
+        Dict[str, Any]: The keyword arguments for generate_commit_timestamps.
+    """
+    per_day = min(commits, 1000)
+    days = -(-commits // per_day)
+    from_date = datetime.date(2000, 1, 1)
+
+    return {
+        "from_date": from_date,
+        "to_date": from_date + datetime.timedelta(days=days - 1),
+        "min_days_per_week": 7,
+        "max_days_per_week": 7,
+        "include_weekends": True,
+        "min_per_day": per_day,
+        "max_per_day": per_day,
+        "include_out_of_hours": True,
+    }
+
+
+def measure(stage: str, items: Iterable[Any], step: Callable[[Any], None], finish: Callable[[], None] = lambda: None) -> Dict[str, Any]:
+    """
+    Time a stage, recording the latency of each chunk of items.
+
+    Args:
+        stage (str): The name of the stage.
+        items (Iterable[Any]): The items to process, consumed as part of the timing.
+        step (Callable[[Any], None]): Called with each item.
+        finish (Callable[[], None]): Called once every item has been processed, within the timing.
+
+    Returns:
+        Dict[str, Any]: The stage's results.
+    """
+    latencies = []
+    count = 0
+
+    start = chunk_start = time.perf_counter()
+    for item in items:
+        step(item)
+        count += 1
+
+        if count % CHUNK_SIZE == 0:
+            now = time.perf_counter()
+            latencies.append((now - chunk_start) / CHUNK_SIZE)
+            chunk_start = now
+
+    finish()
+    end = time.perf_counter()
+
+    # Don't lose the tail, or the only chunk of a small workload
+    if count % CHUNK_SIZE:
+        latencies.append((end - chunk_start) / (count % CHUNK_SIZE))
+
+    micros = np.array(latencies) * 1e6
+
+    return {
+        "stage": stage,
+        "items": count,
+        "seconds": end - start,
+        "items_per_second": count / (end - start),
+        "latency_us": {
+            "p50": float(np.percentile(micros, 50)),
+            "p90": float(np.percentile(micros, 90)),
+            "p99": float(np.percentile(micros, 99)),
+            "max": float(micros.max()),
+        },
+        "peak_rss_kb": peak_rss() // 1024,
+    }
+
+
+def bench_timestamps(commits: int, seed: int) -> Dict[str, Any]:
+    timestamps = generate_commit_timestamps(rng=np.random.default_rng(seed), **workload(commits))
+
+    return measure("timestamps", timestamps, lambda _: None)
+
+
+def bench_schedule(commits: int, seed: int) -> Dict[str, Any]:
+    # The same timestamps as seconds, without a datetime per commit
+    schedule = generate_commit_schedule(rng=np.random.default_rng(seed), **workload(commits))
+
+    return measure("timestamps[schedule]", schedule, lambda _: None)
+
+
+def bench_messages(commits: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+
+    return measure("messages", range(commits), lambda _: generate_commit_message(rng))
+
+
+def bench_batched_messages(commits: int, seed: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+
+    def messages():
+        for start in range(0, commits, CHUNK_SIZE):
+            yield from generate_commit_messages(min(CHUNK_SIZE, commits - start), rng)
+
+    return measure("messages[batched]", messages(), lambda _: None)
+
+
+def bench_render(iterations: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as scratch:
+        return measure("render", range(iterations), lambda i: render_templates("benchmark", os.path.join(scratch, str(i))))
+
+
+def bench_commits(commits: int, seed: int, backend: str) -> Dict[str, Any]:
+    # Plan everything up front so only the writing is timed
+    timestamps = list(generate_commit_timestamps(rng=np.random.default_rng(seed), **workload(commits)))
+    rng = random.Random(seed)
+    messages = [generate_commit_message(rng) for _ in timestamps]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = os.path.join(scratch, "benchmark")
+        git = create_git(backend, "Benchmark", "benchmark@example.com", "benchmark", directory)
+
+        create_repo(git, "benchmark", directory, timestamps[0])
+
+        result = measure(f"commits[{backend}]", zip(timestamps[1:], messages[1:]), lambda commit: git.commit(*commit), git.close)
+
+    return result
+
+
+def bench_startup(iterations: int) -> Dict[str, Any]:
+    # A cold interpreter every time, up to the point the command line is parsed
+    command = [sys.executable, "main.py", "--help"]
+
+    return measure("startup", range(iterations), lambda _: subprocess.run(command, check=True, stdout=subprocess.DEVNULL))
+
+
+def bench_stream(years: int, memory_limit: int, seed: int, backend: str) -> Dict[str, Any]:
+    # The whole of main, streaming a range of every day busy, so the peak RSS is the generator's own
+    import main
+    import utils.options as options
+
+    # Whole years up to the last one, as the range can't run past today
+    to_date = datetime.date(datetime.date.today().year - 1, 12, 31)
+    from_date = datetime.date(to_date.year - years + 1, 1, 1)
+    commits = ((to_date - from_date).days + 1) * STREAM_PER_DAY
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Built without the configuration file, so the local one can't change what's measured
+        spec = options.MAIN.build(
+            username="Benchmark",
+            email="benchmark@example.com",
+            name="benchmark",
+            directory=os.path.join(scratch, "benchmark"),
+            from_date=from_date,
+            to_date=to_date,
+            min_days_per_week=7,
+            max_days_per_week=7,
+            include_weekends=True,
+            min_per_day=STREAM_PER_DAY,
+            max_per_day=STREAM_PER_DAY,
+            backend=backend,
+            seed=seed,
+            memory_limit=memory_limit,
+        )
+
+        start = time.perf_counter()
+        main.run(spec)
+        end = time.perf_counter()
+
+    return {
+        "stage": f"stream[{backend}]",
+        "years": years,
+        "memory_limit_mb": memory_limit,
+        "items": commits,
+        "seconds": end - start,
+        "items_per_second": commits / (end - start),
+        "peak_rss_kb": peak_rss() // 1024,
+    }
+
+
+def run_isolated(function: Callable, *args: Any) -> Dict[str, Any]:
+    # A fresh interpreter per stage keeps each peak RSS to that stage alone
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+@click.command()
+@click.option("--sizes", help="comma separated commit counts to benchmark", default="1000,100000,1000000")
+@click.option("--backend", "backends", help="the backends to benchmark commit writing with, may be repeated", type=click.Choice(list(BACKENDS)), multiple=True, default=["pack"])
+@click.option("--render-iterations", help="the number of repositories to render the templates for", type=click.IntRange(min=1), default=100)
+@click.option("--startup-iterations", help="the number of cold starts to time", type=click.IntRange(min=1), default=20)
+@click.option("--startup-budget", help="fail if the mean cold start takes longer than this many milliseconds", type=click.FloatRange(min=0), default=STARTUP_BUDGET_MS)
+@click.option("--stream-years", help="comma separated range lengths in years to stream within the memory limit, empty to skip", default="1,20")
+@click.option("--stream-limit", help="the memory limit in MiB to stream with, failing if any streamed run's peak RSS goes over it", type=click.IntRange(min=1), default=256)
+@click.option("--seed", help="the seed for every workload", type=int, default=0)
+@click.option("--output", help="the file to write the JSON results to, defaults to stdout", type=click.Path(dir_okay=False, writable=True), default=None)
+def benchmark(sizes: str, backends: List[str], render_iterations: int, startup_iterations: int, startup_budget: float, stream_years: str, stream_limit: int, seed: int, output: str) -> None:
+    """
+    Benchmark each generation stage on fixed-seed workloads and emit the results as JSON.
+
+    Every stage runs in its own process, reporting throughput, per item latency
+    percentiles (averaged over chunks of items) and that process's peak RSS.
+    Cold start time is measured first, failing if it's over the budget. Last, whole
+    runs stream ranges of different lengths, failing if any goes over the memory limit.
+    """
+    startup = bench_startup(startup_iterations)
+    startup_ms = startup["seconds"] / startup_iterations * 1e3
+    results = [startup]
+
+    click.echo(f"Cold start {startup_ms:,.1f}ms", err=True)
+
+    for commits in [int(size) for size in sizes.split(",")]:
+        click.echo(f"Benchmarking {commits} commits", err=True)
+
+        stages = [
+            (bench_timestamps, commits, seed),
+            (bench_schedule, commits, seed),
+            (bench_messages, commits, seed),
+            (bench_batched_messages, commits, seed),
+            (bench_render, render_iterations),
+        ]
+        stages.extend((bench_commits, commits, seed, backend) for backend in backends)
+
+        for function, *args in stages:
+            result = run_isolated(function, *args)
+            result["commits"] = commits
+            results.append(result)
+
+            click.echo(f"  {result['stage']:<24} {result['items_per_second']:>14,.0f}/s  p99 {result['latency_us']['p99']:>10,.1f}us  rss {result['peak_rss_kb']:>10,}KB", err=True)
+
+    over_limit = []
+
+    for years in [int(length) for length in stream_years.split(",") if length]:
+        for backend in backends:
+            result = run_isolated(bench_stream, years, stream_limit, seed, backend)
+            results.append(result)
+
+            click.echo(f"Streamed {years} years {result['stage']:<14} {result['items_per_second']:>14,.0f}/s  rss {result['peak_rss_kb']:>10,}KB", err=True)
+
+            if result["peak_rss_kb"] > stream_limit * 1024:
+                over_limit.append(result)
+
+    report = json.dumps(
+        {
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "results": results,
+        },
+        indent=2,
+    )
+
+    if output is None:
+        click.echo(report)
+    else:
+        with open(output, "w") as f:
+            f.write(report + "\n")
+
+    if startup_ms > startup_budget:
+        click.echo(f"Cold start of {startup_ms:,.1f}ms is over the {startup_budget:,.1f}ms budget", err=True)
+        raise SystemExit(1)
+
+    for result in over_limit:
+        click.echo(f"Streaming {result['years']} years peaked at {result['peak_rss_kb']:,}KB, over the {stream_limit:,}MiB limit", err=True)
+
+    if over_limit:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    benchmark()
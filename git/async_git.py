@@ -0,0 +1,94 @@
+import asyncio
+import datetime
+import os
+from typing import List, Optional, Union
+
+from git.dates import format_raw_date
+
+
+class AsyncGit(object):
+    """
+    An asyncio variant of the subprocess Git backend.
+
+    Each call still runs the git binary, but awaits it rather than blocking, so many
+    repositories can be driven from one event loop. A semaphore, which may be shared
+    between repositories, bounds how many git processes are in flight at once.
+    """
+
+    def __init__(self, username: str, email: str, name: str, directory: str, semaphore: Optional[asyncio.Semaphore] = None) -> None:
+        self.username = username
+        self.email = email
+        self.name = name
+        self.directory = directory
+        self.semaphore = semaphore or asyncio.Semaphore(os.cpu_count() or 1)
+
+    async def _run(self, args: List[str], env: Optional[dict] = None) -> asyncio.subprocess.Process:
+        async with self.semaphore:
+            process = await asyncio.create_subprocess_exec(
+                "git",
+                *args,
+                cwd=self.directory,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            process.output, process.error = await process.communicate()
+
+        return process
+
+    async def init(self) -> None:
+        try:
+            process = await self._run(["init"])
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while creating the repository: {str(e)}") from e
+
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to initialize Git repository: {process.error.decode()}")
+
+    async def stage(self) -> None:
+        try:
+            process = await self._run(["stage", "."])
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while staging: {str(e)}") from e
+
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to stage: {process.error.decode()}")
+
+    async def commit(self, at: Union[datetime.datetime, int], message: str) -> None:
+        args = ["commit", "--allow-empty", "-m", message]
+        date = format_raw_date(at)
+
+        try:
+            process = await self._run(
+                args,
+                env={
+                    "GIT_AUTHOR_NAME": self.username,
+                    "GIT_AUTHOR_EMAIL": self.email,
+                    "GIT_AUTHOR_DATE": date,
+                    "GIT_COMMITTER_NAME": self.username,
+                    "GIT_COMMITTER_EMAIL": self.email,
+                    "GIT_COMMITTER_DATE": date,
+                },
+            )
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while committing: {str(e)}") from e
+
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to commit: {['git', *args]}")
+
+    async def head_timestamp(self) -> Optional[datetime.datetime]:
+        try:
+            process = await self._run(["log", "-1", "--format=%ct"])
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while reading the HEAD commit: {str(e)}") from e
+
+        # An unborn branch has no HEAD commit yet
+        if process.returncode != 0 or not process.output.strip():
+            return None
+
+        # Naive local time, the same as the generated timestamps
+        return datetime.datetime.fromtimestamp(int(process.output.strip()))
+
+    async def close(self) -> None:
+        # Every subprocess call has already completed, so there is nothing to flush
+        pass
@@ -0,0 +1,36 @@
+from git.git import Git
+from git.fast_import import FastImportGit
+from git.objects import ObjectStoreGit
+from git.pack import PackGit
+from git.plumbing import PlumbingGit
+
+# Writer backends selectable with the "backend" parameter
+BACKENDS = {
+    "subprocess": Git,
+    "plumbing": PlumbingGit,
+    "fast-import": FastImportGit,
+    "objects": ObjectStoreGit,
+    "pack": PackGit,
+}
+
+
+def create_git(backend: str, username: str, email: str, name: str, directory: str, reflog: bool = False) -> Git:
+    """
+    Create the Git writer for the requested backend.
+
+    Args:
+        backend (str): The name of the backend, one of BACKENDS.
+        username (str): The name of the user who should be attributed to the commits.
+        email (str): The email of the user who should be attributed to the commits.
+        name (str): The name of the repository.
+        directory (str): The directory of the repository.
+        reflog (bool): Whether to log the branch's update with one entry summarising the run, for the backends
+            which only move the branch once it's finished.
+
+    Returns:
+        Git: The writer for the backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}. Must be one of {', '.join(BACKENDS)}")
+
+    return BACKENDS[backend](username, email, name, directory, reflog)
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import struct
+from array import array
+
+import numpy as np
+
+from git.graph import CommitGraph
+
+# Parent positions in the commit data chunk, see gitformat-commit-graph(5)
+NO_PARENT = 0x70000000
+EXTRA_EDGES = 0x80000000
+LAST_EDGE = 0x80000000
+
+# Generation numbers and commit times are capped to the bits the format gives them
+MAX_GENERATION = (1 << 30) - 1
+MAX_COMMIT_TIME = (1 << 34) - 1
+
+
+def generation_numbers(graph: CommitGraph) -> np.ndarray:
+    """
+    Compute each commit's topological level, one more than the highest of its parents, with roots at 1.
+
+    Args:
+        graph (CommitGraph): The commits, in the order they were added.
+
+    Returns:
+        np.ndarray: The generation number of every commit, indexed like the graph.
+    """
+    offsets = graph.parent_offsets
+    parents = graph.parent_indices
+    generations = array("I", bytes(4 * len(graph)))
+
+    # Parents are always added before their children, so one forward pass settles every level
+    for index in range(len(graph)):
+        level = 0
+        for position in range(offsets[index], offsets[index + 1]):
+            if generations[parents[position]] > level:
+                level = generations[parents[position]]
+
+        generations[index] = level + 1
+
+    return np.minimum(np.frombuffer(generations, dtype=np.uint32).astype(np.int64), MAX_GENERATION)
+
+
+def write_commit_graph(git_directory: str, graph: CommitGraph) -> str:
+    """
+    Write a commit-graph file for a complete history, so git can walk it without parsing commits.
+
+    Args:
+        git_directory (str): The .git directory of the repository.
+        graph (CommitGraph): Every commit in the repository, see CommitGraph.complete.
+
+    Returns:
+        str: The path of the commit-graph file.
+    """
+    if not graph.complete:
+        raise ValueError("A commit-graph can only be written from a complete history")
+
+    count = len(graph)
+
+    # Sort by object id, comparing big-endian words so the order matches the raw bytes
+    keys = np.frombuffer(graph.object_ids, dtype=">u4").reshape(count, 5)
+    order = np.lexsort(keys.T[::-1])
+    positions = np.empty(count, dtype=np.int64)
+    positions[order] = np.arange(count)
+
+    object_ids = np.frombuffer(graph.object_ids, dtype=np.uint8).reshape(count, 20)[order]
+    trees = np.frombuffer(graph.trees, dtype=np.uint8).reshape(count, 20)[order]
+
+    # The first byte of each object id, to build the fanout
+    fanout = np.searchsorted(object_ids[:, 0], np.arange(256), side="right").astype(">u4")
+
+    # Parent positions, with any beyond the second spilling into the extra edge list
+    offsets = np.frombuffer(graph.parent_offsets, dtype=np.uint32).astype(np.int64)
+    parents = positions[np.frombuffer(graph.parent_indices, dtype=np.uint32).astype(np.int64)]
+    parent_counts = np.diff(offsets)
+
+    first_parents = np.full(count, NO_PARENT, dtype=np.int64)
+    second_parents = np.full(count, NO_PARENT, dtype=np.int64)
+    first_parents[parent_counts >= 1] = parents[offsets[:-1][parent_counts >= 1]]
+    second_parents[parent_counts == 2] = parents[offsets[:-1][parent_counts == 2] + 1]
+
+    # Extra edges are listed in object id order, the same as git writes them
+    edges = []
+    for index in order[parent_counts[order] > 2].tolist():
+        second_parents[index] = EXTRA_EDGES | len(edges)
+        start, end = offsets[index] + 1, offsets[index + 1]
+        extra = parents[start:end].tolist()
+        extra[-1] |= LAST_EDGE
+        edges.extend(extra)
+
+    generations = generation_numbers(graph)
+    commit_times = np.clip(np.frombuffer(graph.commit_times, dtype=np.int64), 0, MAX_COMMIT_TIME)
+
+    words = np.empty((count, 4), dtype=">u4")
+    words[:, 0] = first_parents
+    words[:, 1] = second_parents
+    words[:, 2] = (generations << 2) | (commit_times >> 32)
+    words[:, 3] = commit_times & 0xFFFFFFFF
+
+    # Rows are tree, parents, then generation and time, in object id order
+    commit_data = np.concatenate([trees, words[order].view(np.uint8).reshape(count, 16)], axis=1)
+
+    chunks = [
+        (b"OIDF", fanout.tobytes()),
+        (b"OIDL", object_ids.tobytes()),
+        (b"CDAT", commit_data.tobytes()),
+    ]
+    if edges:
+        chunks.append((b"EDGE", np.array(edges, dtype=">u4").tobytes()))
+
+    # Signature, version 1, SHA-1, the number of chunks and no base graphs
+    header = b"CGPH" + struct.pack(">BBBB", 1, 1, len(chunks), 0)
+
+    table = b""
+    offset = len(header) + (len(chunks) + 1) * 12
+    for chunk_id, data in chunks:
+        table += chunk_id + struct.pack(">Q", offset)
+        offset += len(data)
+    table += bytes(4) + struct.pack(">Q", offset)
+
+    data = header + table + b"".join(data for _, data in chunks)
+
+    info_directory = os.path.join(git_directory, "objects", "info")
+    path = os.path.join(info_directory, "commit-graph")
+    temporary_path = path + ".lock"
+
+    try:
+        os.makedirs(info_directory, exist_ok=True)
+
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+            f.write(hashlib.sha1(data).digest())
+
+        os.replace(temporary_path, path)
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred while writing the commit-graph: {str(e)}") from e
+
+    return path
@@ -0,0 +1,96 @@
+import datetime
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+# Naive timestamps count from here, the same as numpy's datetime64
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# Hours of conversions to remember, timestamps arrive in order so a year's worth never misses
+LOCAL_HOURS_CACHED = 8192
+
+
+def to_seconds(at: datetime.datetime) -> int:
+    """
+    Convert a naive timestamp to the naive local seconds since the epoch held by a Schedule.
+
+    Args:
+        at (datetime.datetime): The naive timestamp.
+
+    Returns:
+        int: The seconds since the epoch, in naive local time.
+    """
+    return (at - EPOCH) // datetime.timedelta(seconds=1)
+
+
+def from_seconds(seconds: int) -> datetime.datetime:
+    """
+    Convert naive local seconds since the epoch back to a naive timestamp, see to_seconds.
+
+    Args:
+        seconds (int): The seconds since the epoch, in naive local time.
+
+    Returns:
+        datetime.datetime: The naive timestamp.
+    """
+    return EPOCH + datetime.timedelta(seconds=seconds)
+
+
+def local_time(seconds: int) -> Tuple[int, str]:
+    """
+    Convert naive local time to UTC the way datetime.astimezone does, including within DST gaps and folds.
+
+    Args:
+        seconds (int): Naive local seconds since the epoch.
+
+    Returns:
+        Tuple[int, str]: What to add to get UTC seconds since the epoch, and the "+hhmm" offset to show.
+    """
+    local = from_seconds(seconds).astimezone()
+
+    return int(local.timestamp()) - seconds, local.strftime("%z")
+
+
+@lru_cache(maxsize=LOCAL_HOURS_CACHED)
+def local_hour(hour: int) -> Optional[Tuple[int, str]]:
+    """
+    Convert a whole hour of naive local time at once, see local_time.
+
+    Offsets almost always change on the hour, so this saves converting every timestamp,
+    but any hour which doesn't convert the same at both ends is left to local_time.
+
+    Args:
+        hour (int): The hour, counted in naive local time since the epoch.
+
+    Returns:
+        Optional[Tuple[int, str]]: The conversion of every second in the hour, or None if it changes within it.
+    """
+    start = local_time(hour * 3600)
+
+    return start == local_time(hour * 3600 + 3599) and start or None
+
+
+def format_raw_date(at: Union[datetime.datetime, int]) -> str:
+    """
+    Format a timestamp in git's raw "<seconds> <offset>" date format.
+
+    Naive timestamps are treated as local time, matching how git interprets
+    the GIT_AUTHOR_DATE/GIT_COMMITTER_DATE values used by the subprocess backend.
+
+    Args:
+        at (Union[datetime.datetime, int]): The timestamp to format, or naive local seconds
+            since the epoch as held by a Schedule.
+
+    Returns:
+        str: The timestamp in raw format, e.g. "1712345678 +0100".
+    """
+    if isinstance(at, datetime.datetime):
+        if at.tzinfo is not None:
+            local = at.astimezone()
+
+            return f"{int(local.timestamp())} {local.strftime('%z')}"
+
+        at = to_seconds(at)
+
+    shift, offset = local_hour(at // 3600) or local_time(at)
+
+    return f"{at + shift} {offset}"
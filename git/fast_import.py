@@ -0,0 +1,99 @@
+import datetime
+import subprocess
+from typing import Optional, Union
+
+from git.git import Git
+from git.dates import format_raw_date
+
+
+class FastImportGit(Git):
+    """
+    A Git backend which streams every commit into a single long-lived `git fast-import` process.
+
+    Generated commits are empty, so each one reuses its parent's tree and only the commit
+    object itself is written. The initial commit still goes through `git commit` as
+    fast-import can't see the files staged in the index.
+    """
+
+    def __init__(self, username: str, email: str, name: str, directory: str, reflog: bool = False) -> None:
+        super().__init__(username, email, name, directory, reflog)
+
+        self.process: Optional[subprocess.Popen] = None
+        self.ref = b""
+        self.start_from = b""
+        self.identity = f"{username} <{email}>".encode()
+
+    def commit(self, at: Union[datetime.datetime, int], message: str) -> None:
+        if self.process is None:
+            if self.head() is None:
+                # Nothing to build on yet, so create the root commit from the index
+                super().commit(at, message)
+                return
+
+            self._start()
+
+        date = format_raw_date(at).encode()
+        # Ending in a newline, the same as `git commit` and the object store writers leave it
+        data = message.encode() + b"\n"
+
+        try:
+            self.process.stdin.write(
+                b"".join(
+                    [
+                        b"commit ",
+                        self.ref,
+                        b"\nauthor ",
+                        self.identity,
+                        b" ",
+                        date,
+                        b"\ncommitter ",
+                        self.identity,
+                        b" ",
+                        date,
+                        b"\ndata ",
+                        str(len(data)).encode(),
+                        b"\n",
+                        data,
+                        b"\n",
+                        self.start_from,
+                    ]
+                )
+            )
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while committing: {str(e)}") from e
+
+        # Only the first commit of the stream needs to be told where the branch currently is
+        self.start_from = b""
+
+    def flush(self) -> None:
+        # Ending the stream moves the branch, the next commit starts a new one from there
+        self.close()
+
+    def close(self) -> None:
+        if self.process is None:
+            return
+
+        try:
+            self.process.stdin.write(b"done\n")
+            self.process.stdin.close()
+            return_code = self.process.wait()
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while finishing the import: {str(e)}") from e
+        finally:
+            self.process = None
+
+        if return_code != 0:
+            raise RuntimeError(f"Failed to import commits: git fast-import exited with {return_code}")
+
+    def _start(self) -> None:
+        self.ref = self.branch().encode()
+        self.start_from = b"from " + self.ref + b"^0\n"
+
+        try:
+            self.process = subprocess.Popen(
+                ["git", "fast-import", "--quiet", "--done", "--date-format=raw"],
+                cwd=self.directory,
+                stdin=subprocess.PIPE,
+            )
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while starting git fast-import: {str(e)}") from e
@@ -1,13 +1,19 @@
 import datetime
+import os
 import subprocess
+from typing import Dict, Optional, Union
+
+from git.dates import format_raw_date
 
 
 class Git(object):
-    def __init__(self, username: str, email: str, name: str, directory: str) -> None:
+    def __init__(self, username: str, email: str, name: str, directory: str, reflog: bool = False) -> None:
         self.username = username
         self.email = email
         self.name = name
         self.directory = directory
+        # Whether the backends which move the branch once at the end log it, `git commit` and fast-import always do
+        self.reflog = reflog
 
     def init(self):
         try:
@@ -33,18 +39,21 @@ class Git(object):
         except Exception as e:
             raise RuntimeError(f"An unexpected error occurred while staging: {str(e)}") from e
 
-    def commit(self, at: datetime.datetime, message: str) -> None:
+    def commit(self, at: Union[datetime.datetime, int], message: str) -> None:
+        # Raw dates, so a Schedule's seconds are written without building a datetime for every commit
+        date = format_raw_date(at)
+
         try:
             subprocess.run(
-                ["git", "commit", "--allow-empty", "-m", f"'{message}'"],
+                ["git", "commit", "--allow-empty", "-m", message],
                 cwd=self.directory,
                 env={
                     "GIT_AUTHOR_NAME": self.username,
                     "GIT_AUTHOR_EMAIL": self.email,
-                    "GIT_AUTHOR_DATE": at.isoformat(),
+                    "GIT_AUTHOR_DATE": date,
                     "GIT_COMMITTER_NAME": self.username,
                     "GIT_COMMITTER_EMAIL": self.email,
-                    "GIT_COMMITTER_DATE": at.isoformat(),
+                    "GIT_COMMITTER_DATE": date,
                 },
                 check=True,
             )
@@ -52,3 +61,219 @@ class Git(object):
             raise RuntimeError(f"Failed to commit: {e.cmd}") from e
         except Exception as e:
             raise RuntimeError(f"An unexpected error occurred while committing: {str(e)}") from e
+
+    def head(self) -> Optional[str]:
+        return self.rev_parse("HEAD")
+
+    def rev_parse(self, revision: str) -> Optional[str]:
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "--verify", "--quiet", revision],
+                cwd=self.directory,
+                capture_output=True,
+                text=True,
+            )
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while resolving {revision}: {str(e)}") from e
+
+        # An unborn branch has no HEAD commit yet, or the revision doesn't exist
+        if result.returncode != 0:
+            return None
+
+        return result.stdout.strip()
+
+    def head_timestamp(self) -> Optional[datetime.datetime]:
+        try:
+            result = subprocess.run(
+                ["git", "log", "-1", "--format=%ct"],
+                cwd=self.directory,
+                capture_output=True,
+                text=True,
+            )
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while reading the HEAD commit: {str(e)}") from e
+
+        # An unborn branch has no HEAD commit yet
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+
+        # Naive local time, the same as the generated timestamps
+        return datetime.datetime.fromtimestamp(int(result.stdout.strip()))
+
+    def list_refs(self, prefix: str) -> Dict[str, str]:
+        try:
+            result = subprocess.run(
+                ["git", "for-each-ref", "--format=%(refname) %(objectname)", prefix],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to list the refs under {prefix}: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while listing the refs under {prefix}: {str(e)}") from e
+
+        return dict(line.split(" ") for line in result.stdout.splitlines())
+
+    def branch(self) -> str:
+        try:
+            result = subprocess.run(
+                ["git", "symbolic-ref", "HEAD"],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            return result.stdout.strip()
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to resolve the current branch: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while resolving the current branch: {str(e)}") from e
+
+    def update_ref(self, ref: str, object_id: str) -> None:
+        try:
+            subprocess.run(
+                ["git", "update-ref", ref, object_id],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to update {ref}: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while updating {ref}: {str(e)}") from e
+
+    def delete_ref(self, ref: str) -> None:
+        try:
+            subprocess.run(
+                ["git", "update-ref", "-d", ref],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to delete {ref}: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while deleting {ref}: {str(e)}") from e
+
+    def write_ref(self, ref: str, object_id: str, old: Optional[str] = None, verify: bool = False) -> None:
+        # The same lock-then-rename dance update-ref does, so readers never see a partial ref, without touching any reflog
+        ref_path = os.path.join(self.directory, ".git", ref)
+        lock_path = ref_path + ".lock"
+
+        try:
+            os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+
+            with open(lock_path, "x") as f:
+                f.write(object_id + "\n")
+        except FileExistsError as e:
+            raise RuntimeError(f"Failed to update {ref}: {lock_path} already exists") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while updating {ref}: {str(e)}") from e
+
+        try:
+            # Checked while holding the lock, so nothing else can move the ref in between
+            if verify and self.rev_parse(ref) != old:
+                raise RuntimeError(f"Failed to update {ref}: something else moved it from {old or 'nothing'}")
+
+            os.replace(lock_path, ref_path)
+        except RuntimeError:
+            os.remove(lock_path)
+            raise
+        except Exception as e:
+            os.remove(lock_path)
+            raise RuntimeError(f"An unexpected error occurred while updating {ref}: {str(e)}") from e
+
+    def current_refs(self) -> Dict[str, str]:
+        # Every commit is already on the branch, which is the only ref this writer moves
+        head = self.head()
+
+        return head is not None and {self.branch(): head} or {}
+
+    def checkout_head(self) -> None:
+        try:
+            subprocess.run(
+                ["git", "read-tree", "-u", "--reset", "HEAD"],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to check out HEAD: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while checking out HEAD: {str(e)}") from e
+
+    def write_commit_graph(self) -> None:
+        try:
+            subprocess.run(
+                ["git", "commit-graph", "write", "--reachable"],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to write the commit-graph: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while writing the commit-graph: {str(e)}") from e
+
+    def repack(self) -> None:
+        # Rolls packs of about the same size into one, so runs flushed many times don't leave a pack per flush
+        try:
+            subprocess.run(
+                ["git", "repack", "-d", "-q", "--geometric=2"],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to repack: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while repacking: {str(e)}") from e
+
+    def write_bitmaps(self) -> None:
+        # Bitmaps need everything in packs, then a multi-pack-index covers them all without rewriting any
+        for args in (["repack", "-d", "-q"], ["multi-pack-index", "write", "--bitmap"]):
+            try:
+                subprocess.run(
+                    ["git", *args],
+                    cwd=self.directory,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"Failed to write the reachability bitmaps: {e.stderr}") from e
+            except Exception as e:
+                raise RuntimeError(f"An unexpected error occurred while writing the reachability bitmaps: {str(e)}") from e
+
+    def log_ref_update(self, ref: str, old: Optional[str], new: str, message: str) -> None:
+        # Only ever HEAD's branch, so HEAD's reflog gets the entry too, the same as `git update-ref -m` would
+        now = datetime.datetime.now().astimezone()
+        entry = f"{old or '0' * 40} {new} {self.username} <{self.email}> {int(now.timestamp())} {now.strftime('%z')}\t{message}\n"
+
+        try:
+            for log in (ref, "HEAD"):
+                path = os.path.join(self.directory, ".git", "logs", log)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+                with open(path, "a") as f:
+                    f.write(entry)
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while logging the update of {ref}: {str(e)}") from e
+
+    def flush(self) -> None:
+        # Every commit is already on disk, so there is nothing to let go of
+        pass
+
+    def buffered_bytes(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        # Every subprocess call has already completed, so there is nothing to flush
+        pass
@@ -0,0 +1,86 @@
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+
+class CommitGraph(object):
+    """
+    A compact record of the commits written, their parents, trees and times, and the refs pointing at them.
+
+    Commits are numbered in the order they're added, which is always a topological order as
+    parents have to exist first. Object ids are packed into one bytearray and parents into
+    flat arrays, so each commit costs a few dozen bytes rather than a handful of Python objects.
+
+    Commits which were already in the repository, like the tip being extended, are added
+    without their parents. Such a graph is incomplete and only describes the new commits.
+
+    Methods:
+        add(object_id: str, parents: Sequence[int] = (), tree: Optional[str] = None, commit_time: int = 0) -> int:
+            Records a commit, returning its index.
+
+        add_existing(object_id: str) -> int:
+            Records a commit already in the repository, without its parents.
+
+        object_id(index: int) -> str:
+            Gets the hex object id of a commit.
+
+        parents(index: int) -> List[int]:
+            Gets the indices of a commit's parents, in order.
+
+        trimmed() -> CommitGraph:
+            Starts a new graph holding only the commits the refs point at.
+
+        nbytes() -> int:
+            Counts the bytes held by the graph's arrays.
+    """
+
+    def __init__(self) -> None:
+        self.object_ids = bytearray()
+        self.parent_offsets = array("I", [0])
+        self.parent_indices = array("I")
+        self.trees = bytearray()
+        self.commit_times = array("q")
+        self.refs: Dict[str, int] = {}
+        self.complete = True
+
+    def __len__(self) -> int:
+        return len(self.parent_offsets) - 1
+
+    def add(self, object_id: str, parents: Sequence[int] = (), tree: Optional[str] = None, commit_time: int = 0) -> int:
+        self.object_ids += bytes.fromhex(object_id)
+        self.parent_indices.extend(parents)
+        self.parent_offsets.append(len(self.parent_indices))
+        self.trees += tree and bytes.fromhex(tree) or bytes(20)
+        self.commit_times.append(commit_time)
+
+        return len(self) - 1
+
+    def add_existing(self, object_id: str) -> int:
+        # Its ancestry is already on disk, so the graph no longer describes the whole history
+        self.complete = False
+
+        return self.add(object_id)
+
+    def object_id(self, index: int) -> str:
+        start, end = index * 20, index * 20 + 20
+
+        return self.object_ids[start:end].hex()
+
+    def parents(self, index: int) -> List[int]:
+        start, end = self.parent_offsets[index], self.parent_offsets[index + 1]
+
+        return self.parent_indices[start:end].tolist()
+
+    def trimmed(self) -> "CommitGraph":
+        # Once the refs are on disk nothing needs the commits behind them, so only the tips are carried over
+        graph = CommitGraph()
+        tips: Dict[int, int] = {}
+
+        for ref, index in self.refs.items():
+            if index not in tips:
+                tips[index] = graph.add_existing(self.object_id(index))
+            graph.refs[ref] = tips[index]
+
+        return graph
+
+    def nbytes(self) -> int:
+        return len(self.object_ids) + len(self.trees) + (len(self.parent_offsets) + len(self.parent_indices)) * 4 + len(self.commit_times) * 8
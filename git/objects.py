@@ -0,0 +1,291 @@
+import datetime
+import hashlib
+import os
+import subprocess
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from git.dates import format_raw_date
+from git.git import Git
+from git.graph import CommitGraph
+from git.tree import TreeBuilder
+
+# Writing a commit-graph briefly takes several times the bytes the graph holds
+COMMIT_GRAPH_OVERHEAD = 8
+
+
+def format_signature(identity: bytes, at: Union[datetime.datetime, int]) -> bytes:
+    """
+    Format an author or committer line value.
+
+    Args:
+        identity (bytes): The "Name <email>" identity.
+        at (Union[datetime.datetime, int]): The timestamp of the signature, see format_raw_date.
+
+    Returns:
+        bytes: The signature, e.g. b"Name <email> 1712345678 +0100".
+    """
+    return identity + b" " + format_raw_date(at).encode()
+
+
+def serialize_commit_tail(author: bytes, committer: bytes, message: bytes) -> bytes:
+    """
+    Serialize the part of a commit object body which doesn't depend on its tree or parents.
+
+    Args:
+        author (bytes): The author line value, "Name <email> <seconds> <offset>".
+        committer (bytes): The committer line value, "Name <email> <seconds> <offset>".
+        message (bytes): The commit message.
+
+    Returns:
+        bytes: The author and committer lines followed by the message.
+    """
+    return b"author " + author + b"\ncommitter " + committer + b"\n\n" + message + b"\n"
+
+
+def serialize_commit_tails(identity: bytes, timestamps: Iterable[int], messages: Iterable[str]) -> List[bytes]:
+    """
+    Serialize the tails of many commits, attributing them all to one identity.
+
+    Args:
+        identity (bytes): The "Name <email>" identity, as author and committer.
+        timestamps (Iterable[int]): The naive local seconds since the epoch of each commit, as held by a Schedule.
+        messages (Iterable[str]): The message of each commit.
+
+    Returns:
+        List[bytes]: The tail of every commit, see serialize_commit_tail.
+    """
+    tails = []
+    for seconds, message in zip(timestamps, messages):
+        signature = format_signature(identity, seconds)
+        tails.append(serialize_commit_tail(signature, signature, message.encode()))
+
+    return tails
+
+
+def serialize_commit(tree: str, parents: List[str], tail: bytes) -> bytes:
+    """
+    Serialize the body of a commit object.
+
+    Args:
+        tree (str): The hex object id of the commit's tree.
+        parents (List[str]): The hex object ids of the commit's parents, in order.
+        tail (bytes): The rest of the commit, see serialize_commit_tail.
+
+    Returns:
+        bytes: The commit object body, without the object header.
+    """
+    lines = [b"tree " + tree.encode()]
+    lines.extend(b"parent " + parent.encode() for parent in parents)
+
+    return b"\n".join(lines) + b"\n" + tail
+
+
+def hash_object(kind: bytes, body: bytes) -> Tuple[str, bytes]:
+    """
+    Hash an object the way git does.
+
+    Args:
+        kind (bytes): The object type, e.g. b"commit".
+        body (bytes): The object body.
+
+    Returns:
+        Tuple[str, bytes]: The hex object id and the full object including its header.
+    """
+    data = kind + b" " + str(len(body)).encode() + b"\0" + body
+
+    return hashlib.sha1(data).hexdigest(), data
+
+
+class ObjectStoreGit(Git):
+    """
+    A Git backend which writes commit objects straight into `.git/objects`.
+
+    `git init`, staging and reading back the staged tree still use the git binary,
+    but every commit after that is hashed, compressed and written in-process. Commits
+    and refs are tracked in a CommitGraph, and refs are only updated once, when the
+    writer is closed or flushed.
+    """
+
+    def __init__(self, username: str, email: str, name: str, directory: str, reflog: bool = False) -> None:
+        super().__init__(username, email, name, directory, reflog)
+
+        self.git_directory = os.path.join(directory, ".git")
+        self.identity = f"{username} <{email}>".encode()
+        self.tree: Optional[str] = None
+        self.graph = CommitGraph()
+        self.staged: Optional[TreeBuilder] = None
+        self.ref = ""
+        self.object_directories = set()
+        # The commit each ref points at on disk, by index in the graph
+        self.published: Dict[str, int] = {}
+        # The branch's tip when the run started, and the commits written since, for its reflog
+        self.base: Optional[str] = None
+        self.count = 0
+
+    def stage_files(self, files: Iterable[Tuple[str, bytes]]) -> None:
+        # Hashes the files straight into blobs and trees, so nothing touches the worktree or index
+        builder = TreeBuilder()
+        for path, contents in files:
+            builder.add(path, self.write_object(b"blob", contents))
+
+        self._start(builder.write(self.write_object))
+        self.staged = builder
+
+    def read_tree(self) -> TreeBuilder:
+        # The pack backend's objects can't be read back until it's closed, so reuse the files just staged
+        if self.staged is not None:
+            return self.staged
+
+        self.begin()
+
+        try:
+            result = subprocess.run(
+                ["git", "ls-tree", "-r", "-z", self.tree],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to read tree {self.tree}: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while reading tree {self.tree}: {str(e)}") from e
+
+        entries = []
+        for line in result.stdout.split("\0"):
+            if line:
+                # "<mode> <type> <object id>\t<path>"
+                details, path = line.split("\t", 1)
+                mode, _, object_id = details.split(" ")
+                entries.append((path, mode.encode(), object_id))
+
+        return TreeBuilder(entries)
+
+    def begin(self) -> None:
+        # Resolves the branch, its tip and its tree the first time they're needed
+        if self.tree is None:
+            self._start()
+
+    def commit(self, at: Union[datetime.datetime, int], message: str, parents: Optional[List[int]] = None, ref: Optional[str] = None) -> int:
+        signature = format_signature(self.identity, at)
+
+        return self.commit_serialized(serialize_commit_tail(signature, signature, message.encode()), parents, ref)
+
+    def commit_serialized(self, tail: bytes, parents: Optional[List[int]] = None, ref: Optional[str] = None) -> int:
+        self.begin()
+
+        # By default commit on top of the current branch
+        ref = ref or self.ref
+        if parents is None:
+            parents = ref in self.graph.refs and [self.graph.refs[ref]] or []
+
+        body = serialize_commit(self.tree, [self.graph.object_id(parent) for parent in parents], tail)
+
+        # The committer line is the last header, ending "<seconds> <offset>"
+        commit_time = int(tail[: tail.index(b"\n\n")].rsplit(b" ", 2)[1])
+
+        self.graph.refs[ref] = self.graph.add(self.write_object(b"commit", body), parents, self.tree, commit_time)
+        self.count += 1
+
+        return self.graph.refs[ref]
+
+    def write_object(self, kind: bytes, body: bytes) -> str:
+        object_id, data = hash_object(kind, body)
+
+        object_directory = os.path.join(self.git_directory, "objects", object_id[:2])
+        object_path = os.path.join(object_directory, object_id[2:])
+
+        try:
+            if object_directory not in self.object_directories:
+                os.makedirs(object_directory, exist_ok=True)
+                self.object_directories.add(object_directory)
+
+            # Write to a temporary file first so a crash never leaves a truncated object behind
+            temporary_path = object_path + ".tmp"
+            with open(temporary_path, "wb") as f:
+                f.write(zlib.compress(data, 1))
+
+            os.replace(temporary_path, object_path)
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while writing object {object_id}: {str(e)}") from e
+
+        return object_id
+
+    def close(self) -> None:
+        self._publish()
+
+        # Once per run rather than every flush, so the reflog gets one entry however the run was published
+        tip = self.ref in self.published and self.graph.object_id(self.published[self.ref]) or None
+        if self.reflog and tip is not None and tip != self.base:
+            self.log_ref_update(self.ref, self.base, tip, f"generate: {self.count} commits")
+            self.base = tip
+            self.count = 0
+
+    def flush(self) -> None:
+        # Publishes the refs, so the commits behind them no longer need tracking
+        self._publish()
+
+        self.graph = self.graph.trimmed()
+        self.published = dict(self.graph.refs)
+
+    def _publish(self) -> None:
+        for ref, index in self.graph.refs.items():
+            # Refs still on the commit they were already at are up to date
+            if self.published.get(ref) != index:
+                self.update_ref(ref, self.graph.object_id(index))
+
+        # Refs dropped since, like merged branches, go only once everything they pointed at is reachable another way
+        for ref in self.published.keys() - self.graph.refs.keys():
+            self.delete_ref(ref)
+
+        self.published = dict(self.graph.refs)
+
+    def buffered_bytes(self) -> int:
+        # Only a complete graph is written as a commit-graph, see write_commit_graph
+        return self.graph.nbytes() * (self.graph.complete and COMMIT_GRAPH_OVERHEAD or 1)
+
+    def write_commit_graph(self) -> None:
+        # Every commit's parents, tree and time are already known, unless the history started before this run
+        if not self.graph.complete or not len(self.graph):
+            return super().write_commit_graph()
+
+        # Imported here as it needs numpy, which the cache check in main avoids loading
+        from git.commit_graph import write_commit_graph
+
+        write_commit_graph(self.git_directory, self.graph)
+
+    def current_refs(self) -> Dict[str, str]:
+        return {ref: self.graph.object_id(index) for ref, index in self.graph.refs.items()}
+
+    def update_ref(self, ref: str, object_id: str) -> None:
+        # In-process rather than a subprocess per ref, and logged once on close rather than every flush
+        self.write_ref(ref, object_id)
+
+    def _start(self, tree: Optional[str] = None) -> None:
+        self.ref = self.branch()
+
+        head = self.base = self.head()
+        if head is not None:
+            self.published[self.ref] = self.graph.refs[self.ref] = self.graph.add_existing(head)
+
+            # Carry on from the tip's tree, whatever has happened to the worktree and index since
+            tree = tree or self.rev_parse(f"{head}^{{tree}}")
+
+        if tree is not None:
+            self.tree = tree
+            return
+
+        try:
+            result = subprocess.run(
+                ["git", "write-tree"],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            self.tree = result.stdout.strip()
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to write the staged tree: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while writing the staged tree: {str(e)}") from e
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import struct
+import zlib
+from array import array
+
+from git.objects import ObjectStoreGit, hash_object
+
+# Pack entry type numbers, see gitformat-pack(5)
+OBJECT_TYPES = {
+    b"commit": 1,
+    b"tree": 2,
+    b"blob": 3,
+    b"tag": 4,
+}
+
+
+# Roughly what remembering one packed object id costs, as a hex string in a set
+PACKED_OBJECT_BYTES = 128
+
+# Roughly what each object in the pack costs, held until it's finished and then while building its index
+PACK_ENTRY_BYTES = 160
+
+
+class PackWriter(object):
+    """
+    Writes objects into a single undeltified packfile and its version 2 index.
+
+    Objects are appended to a temporary pack as they arrive. Once finished the object
+    count in the header is patched, the trailing checksum is added, the index is written
+    and both are renamed into place, pack first so git never sees an index without its pack.
+    """
+
+    def __init__(self, pack_directory: str) -> None:
+        self.pack_directory = pack_directory
+        self.temporary_path = os.path.join(pack_directory, f"tmp_pack_{os.getpid()}")
+        self.object_ids = bytearray()
+        self.crcs = array("I")
+        self.offsets = array("Q")
+
+        os.makedirs(pack_directory, exist_ok=True)
+        self.file = open(self.temporary_path, "w+b")
+
+        # The object count is patched once we know it
+        self.file.write(b"PACK" + struct.pack(">II", 2, 0))
+        self.offset = 12
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def write(self, kind: bytes, object_id: str, body: bytes) -> None:
+        # Type and inflated size, little-endian base 128 with the type in the first byte
+        size = len(body)
+        header = bytearray([(OBJECT_TYPES[kind] << 4) | (size & 0x0F)])
+        size >>= 4
+        while size:
+            header[-1] |= 0x80
+            header.append(size & 0x7F)
+            size >>= 7
+
+        entry = bytes(header) + zlib.compress(body, 1)
+
+        self.file.write(entry)
+        self.object_ids += bytes.fromhex(object_id)
+        self.crcs.append(zlib.crc32(entry))
+        self.offsets.append(self.offset)
+        self.offset += len(entry)
+
+    def finish(self) -> str:
+        count = len(self)
+
+        # Patch the object count, then checksum the whole pack
+        self.file.seek(8)
+        self.file.write(struct.pack(">I", count))
+        self.file.flush()
+        self.file.seek(0)
+
+        checksum = hashlib.sha1()
+        while chunk := self.file.read(1 << 20):
+            checksum.update(chunk)
+        pack_checksum = checksum.digest()
+
+        self.file.write(pack_checksum)
+        self.file.close()
+
+        pack_name = f"pack-{pack_checksum.hex()}"
+        index = self._build_index(pack_checksum)
+
+        pack_path = os.path.join(self.pack_directory, pack_name + ".pack")
+        index_path = os.path.join(self.pack_directory, pack_name + ".idx")
+        temporary_index_path = self.temporary_path + ".idx"
+
+        with open(temporary_index_path, "wb") as f:
+            f.write(index)
+
+        os.replace(self.temporary_path, pack_path)
+        os.replace(temporary_index_path, index_path)
+
+        return pack_name
+
+    def _build_index(self, pack_checksum: bytes) -> bytes:
+        # Imported here as numpy is slow to import, and the cache check in main never packs anything
+        import numpy as np
+
+        count = len(self)
+
+        # Sorting whole arrays keeps this to a few bytes an object, rather than a Python object each
+        keys = np.frombuffer(self.object_ids, dtype=">u4").reshape(count, 5)
+        order = np.lexsort(keys.T[::-1])
+        names = np.frombuffer(self.object_ids, dtype=np.uint8).reshape(count, 20)[order]
+
+        fanout = np.searchsorted(names[:, 0], np.arange(256), side="right")
+        crcs = np.frombuffer(self.crcs, dtype=np.uint32)[order]
+        offsets = np.frombuffer(self.offsets, dtype=np.uint64)[order]
+
+        # Offsets past 2GiB spill into the 64-bit table
+        large = offsets >= 0x80000000
+        large_offsets = offsets[large]
+        offsets[large] = 0x80000000 | np.arange(len(large_offsets), dtype=np.uint64)
+
+        # Everything in an index is big-endian
+        index = b"".join(
+            [
+                b"\377tOc",
+                struct.pack(">I", 2),
+                fanout.astype(">u4").tobytes(),
+                names.tobytes(),
+                crcs.astype(">u4").tobytes(),
+                offsets.astype(">u4").tobytes(),
+                large_offsets.astype(">u8").tobytes(),
+                pack_checksum,
+            ]
+        )
+
+        return index + hashlib.sha1(index).digest()
+
+
+class PackGit(ObjectStoreGit):
+    """
+    A Git backend which writes the generated history as one packfile rather than loose objects.
+
+    Generated commits are tiny, so entries are stored whole without deltas. The pack and
+    its index are only published when the writer is flushed or closed, followed by the branch ref.
+    A writer flushed more than once repacks what it wrote when closed, back into about one pack.
+    """
+
+    def __init__(self, username: str, email: str, name: str, directory: str, reflog: bool = False) -> None:
+        super().__init__(username, email, name, directory, reflog)
+
+        self.pack = None
+        self.packed = set()
+
+        # Packs finished by this writer, one per flush
+        self.packs = 0
+
+    def write_object(self, kind: bytes, body: bytes) -> str:
+        object_id, _ = hash_object(kind, body)
+
+        # Commits always have a unique parent, so only other objects can repeat
+        if kind != b"commit":
+            if object_id in self.packed:
+                return object_id
+            self.packed.add(object_id)
+
+        try:
+            if self.pack is None:
+                self.pack = PackWriter(os.path.join(self.git_directory, "objects", "pack"))
+
+            self.pack.write(kind, object_id, body)
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while packing object {object_id}: {str(e)}") from e
+
+        return object_id
+
+    def close(self) -> None:
+        super().close()
+
+        # Each flush finished a pack of its own, which would otherwise pile up for as long as the repository lives
+        if self.packs > 1:
+            self.repack()
+            self.packs = 0
+
+    def flush(self) -> None:
+        super().flush()
+
+        # Repeats of objects in finished packs are harmless, so they needn't be remembered
+        self.packed = set()
+
+    def buffered_bytes(self) -> int:
+        return super().buffered_bytes() + (self.pack is not None and len(self.pack) * PACK_ENTRY_BYTES or 0) + len(self.packed) * PACKED_OBJECT_BYTES
+
+    def _publish(self) -> None:
+        # The refs can only point at commits once the pack holding them is in place
+        if self.pack is not None:
+            try:
+                self.pack.finish()
+            except Exception as e:
+                raise RuntimeError(f"An unexpected error occurred while finishing the pack: {str(e)}") from e
+
+            self.pack = None
+            self.packs += 1
+
+        super()._publish()
@@ -0,0 +1,105 @@
+import datetime
+import subprocess
+from typing import List, Optional, Union
+
+from git.git import Git
+from git.dates import format_raw_date
+
+
+class PlumbingGit(Git):
+    """
+    A Git backend which writes each commit with `git commit-tree`, then moves the branch once when closed.
+
+    `git commit` rewrites the index, takes index.lock and the ref lock, appends to the HEAD and
+    branch reflogs and may start an auto gc, every commit. commit-tree only writes the commit
+    object, so generating skips all of that bookkeeping. The index is only written once, to stage
+    the templates for the initial commit, and the branch is then moved once, or once per flush,
+    failing if anything else moved it meanwhile.
+
+    The branch is written directly, the same way update-ref does but without appending to its reflog.
+    Without a reflog nothing logs the updates, otherwise the branch and HEAD get one entry summarising the run.
+    """
+
+    def __init__(self, username: str, email: str, name: str, directory: str, reflog: bool = False) -> None:
+        super().__init__(username, email, name, directory, reflog)
+
+        self.ref: Optional[str] = None
+        self.tree: Optional[str] = None
+        # The branch's tip before this run, where it is on disk, and the commit it will be moved to
+        self.base: Optional[str] = None
+        self.published: Optional[str] = None
+        self.tip: Optional[str] = None
+        self.count = 0
+
+    def commit(self, at: Union[datetime.datetime, int], message: str) -> None:
+        if self.ref is None:
+            self._start()
+
+        date = format_raw_date(at)
+        parents: List[str] = self.tip is not None and ["-p", self.tip] or []
+
+        try:
+            result = subprocess.run(
+                ["git", "commit-tree", self.tree, *parents, "-m", message],
+                cwd=self.directory,
+                env={
+                    "GIT_AUTHOR_NAME": self.username,
+                    "GIT_AUTHOR_EMAIL": self.email,
+                    "GIT_AUTHOR_DATE": date,
+                    "GIT_COMMITTER_NAME": self.username,
+                    "GIT_COMMITTER_EMAIL": self.email,
+                    "GIT_COMMITTER_DATE": date,
+                },
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to commit: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while committing: {str(e)}") from e
+
+        self.tip = result.stdout.strip()
+        self.count += 1
+
+    def flush(self) -> None:
+        if self.tip is None or self.tip == self.published:
+            return
+
+        # Not update-ref, which still appends to a reflog that already exists, e.g. one made by `git commit`
+        self.write_ref(self.ref, self.tip, self.published, verify=True)
+
+        self.published = self.tip
+
+    def close(self) -> None:
+        self.flush()
+
+        # Once per run rather than every flush, so the reflog gets one entry however the run was published
+        if self.reflog and self.tip is not None and self.tip != self.base:
+            self.log_ref_update(self.ref, self.base, self.tip, f"generate: {self.count} commits")
+            self.base = self.tip
+            self.count = 0
+
+    def _start(self) -> None:
+        self.ref = self.branch()
+        self.base = self.published = self.tip = self.head()
+
+        if self.base is not None:
+            # Carry on from the tip's tree, whatever has happened to the worktree and index since
+            self.tree = self.rev_parse(f"{self.base}^{{tree}}")
+            return
+
+        # Nothing to build on yet, so the root commit gets the templates staged in the index
+        try:
+            result = subprocess.run(
+                ["git", "write-tree"],
+                cwd=self.directory,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            self.tree = result.stdout.strip()
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to write the staged tree: {e.stderr}") from e
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while writing the staged tree: {str(e)}") from e
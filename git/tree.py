@@ -0,0 +1,105 @@
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+# Entry modes, as git writes them in tree objects
+FILE_MODE = b"100644"
+TREE_MODE = b"40000"
+
+
+class TreeBuilder(object):
+    """
+    Builds nested tree objects from file paths in memory, without a worktree or index.
+
+    Each directory is a dict of entry names to either a (mode, object id) pair for a
+    file or another dict for a subdirectory. Written trees are remembered until something
+    under them changes, so rewriting after a few edits only writes the trees along their paths.
+
+    Methods:
+        add(path: str, object_id: str, mode: bytes = FILE_MODE) -> None:
+            Adds or replaces the file at a slash separated path.
+
+        remove(path: str) -> None:
+            Removes the file at a slash separated path, along with any directories left empty.
+
+        paths() -> List[str]:
+            Lists the path of every file, in sorted order.
+
+        write(write_object: Callable[[bytes, bytes], str]) -> str:
+            Writes every changed tree object with the given writer, returning the root tree's id.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, bytes, str]] = ()) -> None:
+        self.root: Dict[str, Union[dict, Tuple[bytes, str]]] = {}
+        self.written: Dict[str, str] = {}
+
+        for path, mode, object_id in entries:
+            self.add(path, object_id, mode)
+
+    def add(self, path: str, object_id: str, mode: bytes = FILE_MODE) -> None:
+        *directories, file = path.split("/")
+
+        entries = self.root
+        for directory in directories:
+            entries = entries.setdefault(directory, {})
+
+        entries[file] = (mode, object_id)
+        self._changed(directories)
+
+    def remove(self, path: str) -> None:
+        *directories, file = path.split("/")
+
+        parents = [self.root]
+        for directory in directories:
+            parents.append(parents[-1][directory])
+
+        del parents[-1][file]
+        self._changed(directories)
+
+        # Git can't store empty trees, so prune any directories the removal emptied
+        for directory, entries, parent in zip(reversed(directories), reversed(parents[1:]), reversed(parents[:-1])):
+            if entries:
+                break
+
+            del parent[directory]
+
+    def paths(self) -> List[str]:
+        paths = []
+        pending = [("", self.root)]
+
+        while pending:
+            prefix, entries = pending.pop()
+            for name, entry in entries.items():
+                path = prefix and f"{prefix}/{name}" or name
+                if isinstance(entry, dict):
+                    pending.append((path, entry))
+                else:
+                    paths.append(path)
+
+        return sorted(paths)
+
+    def write(self, write_object: Callable[[bytes, bytes], str]) -> str:
+        return self._write("", self.root, write_object)
+
+    def _changed(self, directories: list) -> None:
+        # Every tree from the root down to the change has to be written again
+        self.written.pop("", None)
+        for depth in range(1, len(directories) + 1):
+            self.written.pop("/".join(directories[:depth]), None)
+
+    def _write(self, prefix: str, entries: dict, write_object: Callable[[bytes, bytes], str]) -> str:
+        if prefix in self.written:
+            return self.written[prefix]
+
+        serialized = []
+
+        for name, entry in entries.items():
+            if isinstance(entry, dict):
+                # Git orders subtrees as if their names ended with a slash
+                serialized.append((name.encode() + b"/", TREE_MODE, self._write(prefix and f"{prefix}/{name}" or name, entry, write_object)))
+            else:
+                serialized.append((name.encode(), *entry))
+
+        body = b"".join(mode + b" " + name.rstrip(b"/") + b"\0" + bytes.fromhex(object_id) for name, mode, object_id in sorted(serialized))
+
+        self.written[prefix] = write_object(b"tree", body)
+
+        return self.written[prefix]
@@ -1,133 +1,250 @@
 import datetime
-import re
+import os
+import time
 import click
 
-from utils.parameters import resolve_parameter
+import utils.options as options
+from utils.instrumentation import Progress, RunStats, instrument_git, instrumentation, profiled
+from utils.cache import cache_key, hash_file, restore, store
 import utils.parsing as parsing
-from actions.create_repo import create_repo
-from actions.generate_commit_timestamps import generate_commit_timestamps
-from actions.generate_commit_message import generate_commit_message
-from git.git import Git
-from git.config import get_user_name, get_user_email
+from actions.apply_commits import apply_commits
+from actions.create_repo import template_tree_hash
+from git.backends import create_git
+from utils.parameters import RunSpec
+from utils.staging import staged
 
 
 @click.command()
-@resolve_parameter(
-    config_key="username",
-    description="the name of user who should be attributed to the commits",
-    default=get_user_name,
-    parser=parsing.parse_string(re.compile(r"^.*$")),  # Just a username, doesn't have to match anything?
-)
-@resolve_parameter(
-    config_key="email",
-    description="the email of user who should be attributed to the commits",
-    default=get_user_email,
-    parser=parsing.parse_string(re.compile(r"^.*@.*$")),  # Don't fight email addresses, you won't win
-)
-@resolve_parameter(
-    config_key="name",
-    description="the name of the new repository",
-    default=lambda: "bathroom_tiles",
-    parser=parsing.parse_string(re.compile(r"^[a-zA-Z0-9_\-.]{1,100}$")),
-)
-@resolve_parameter(
-    config_key="directory",
-    description="the directory where the repository will be created",
-    default=lambda: "./bathroom_tiles",
-    parser=parsing.parse_directory(),
-)
-@resolve_parameter(
-    config_key="from_date",
-    description="the date from which the commits should be attributed in iso8601 format",
-    default=lambda: (datetime.date.today() - datetime.timedelta(weeks=52, days=1)).isoformat(),
-    parser=parsing.parse_date(min=datetime.date(1970, 1, 1), max=datetime.date.today()),
-)
-@resolve_parameter(
-    config_key="to_date",
-    description="the date to which the commits should be attributed in iso8601 format",
-    default=lambda: (datetime.date.today() - datetime.timedelta(days=1)).isoformat(),
-    parser=parsing.parse_date(min=datetime.date(1970, 1, 1), max=datetime.date.today()),
-)
-@resolve_parameter(
-    config_key="min_days_per_week",
-    description="the minimum number of days per week",
-    default=lambda: 3,
-    parser=parsing.parse_int(min=1, max=7),
-)
-@resolve_parameter(
-    config_key="max_days_per_week",
-    description="the maximum number of days per week",
-    default=lambda: 5,
-    parser=parsing.parse_int(min=1, max=7),
-)
-@resolve_parameter(
-    config_key="include_weekends",
-    description="whether to include weekends in commit generation (true/false)",
-    default=lambda: False,
-    parser=parsing.parse_bool(),
-)
-@resolve_parameter(
-    config_key="min_per_day",
-    description="the minimum number of commits per day",
-    default=lambda: 1,
-    parser=parsing.parse_int(min=1, max=1000),
-)
-@resolve_parameter(
-    config_key="max_per_day",
-    description="the maximum number of commits per day",
-    default=lambda: 10,
-    parser=parsing.parse_int(min=1, max=1000),
-)
-@resolve_parameter(
-    config_key="include_out_of_hours",
-    description="whether to include out-of-hours commits (true/false)",
-    default=lambda: True,
-    parser=parsing.parse_bool(),
-)
-def main(
-    username: str,
-    email: str,
-    name: str,
-    directory: str,
-    from_date: datetime.date,
-    to_date: datetime.datetime,
-    min_days_per_week: int,
-    max_days_per_week: int,
-    include_weekends: bool,
-    min_per_day: int,
-    max_per_day: int,
-    include_out_of_hours: bool,
-) -> None:
-    # Initialise git object
-    git = Git(
-        username,
-        email,
-        name,
-        directory,
-    )
-
-    # Generate the fake commits
-    initial_commit = True
-    for commit_timestamp in generate_commit_timestamps(
-        from_date,
-        to_date,
-        min_days_per_week=min_days_per_week,
-        max_days_per_week=max_days_per_week,
-        include_weekends=include_weekends,
-        min_per_day=min_per_day,
-        max_per_day=max_per_day,
-        include_out_of_hours=include_out_of_hours,
-    ):
-        if initial_commit:
-            # First create the repository
-            create_repo(git, name, directory, commit_timestamp)
-            initial_commit = False
+@options.MAIN.options
+def main(spec: RunSpec) -> None:
+    run(spec)
+
+
+def run(spec: RunSpec) -> RunStats:
+    """
+    Generate a repository from a validated run spec, see options.MAIN.
+
+    Programmatic callers build the spec with options.MAIN.build, skipping click and the configuration file,
+    or keep a session.Session to run many in one process.
+
+    Args:
+        spec (RunSpec): The resolved parameters of the run.
+
+    Returns:
+        RunStats: What the run generated.
+    """
+    started = time.perf_counter()
+    from_date = spec.from_date
+
+    parsing.check_directory(spec.directory, existing=spec.extend or spec.resume)
+
+    # Everything that shapes the commits themselves, however they're streamed or written out
+    history = {
+        "username": spec.username,
+        "email": spec.email,
+        "name": spec.name,
+        "from_date": from_date,
+        "to_date": spec.to_date,
+        "min_days_per_week": spec.min_days_per_week,
+        "max_days_per_week": spec.max_days_per_week,
+        "include_weekends": spec.include_weekends,
+        "min_per_day": spec.min_per_day,
+        "max_per_day": spec.max_per_day,
+        "include_out_of_hours": spec.include_out_of_hours,
+        "backend": spec.backend,
+        "seed": spec.seed,
+        "worktree": spec.worktree,
+        "churn_files": spec.churn_files,
+        "churn_file_size": spec.churn_file_size,
+        "churn_ratio": spec.churn_ratio,
+        "branches": spec.branches,
+        "branch_lifetime": spec.branch_lifetime,
+        "merge_probability": spec.merge_probability,
+        "vocabulary": spec.vocabulary and hash_file(spec.vocabulary),
+    }
+
+    # Checkpoints are only resumed by a run which would generate the same history
+    checkpoint_key = cache_key(history)
+
+    # Reuse a previously built repository if everything that shapes it is the same
+    key = None
+    if spec.cache_directory is not None and not spec.extend and not spec.resume:
+        key = cache_key(
+            {
+                **history,
+                "shards": spec.shards,
+                "memory_limit": spec.memory_limit,
+                "checkpoint": spec.checkpoint,
+                "commit_graph": spec.commit_graph,
+                "bitmaps": spec.bitmaps,
+                "reflog": spec.reflog,
+                "templates": template_tree_hash(),
+                # The templates are rendered with today's date
+                "generated_on": datetime.date.today(),
+            }
+        )
+
+        if restore(spec.cache_directory, key, spec.directory):
+            click.echo(f"Restored {spec.directory} from the cache")
+            return RunStats(spec.directory, None, create_git(spec.backend, spec.username, spec.email, spec.name, spec.directory).head(), time.perf_counter() - started, restored=True)
+
+    # Imported once past the cache, as numpy is the slowest part of starting up
+    import numpy as np
+
+    from actions.checkpoint import read_checkpoint, remove_checkpoint
+    from actions.generate_churn import Churn
+    from actions.generate_sharded_history import generate_sharded_history
+    from actions.generate_streamed_history import generate_streamed_history
+    from actions.generate_topology import Topology
+    from actions.plan_commits import plan_commits
+
+    # Built in the staging directory when there is one, only appearing in place once it's finished
+    with staged(spec.directory, spec.staging_directory) as directory:
+        # Initialise git object
+        git = create_git(
+            spec.backend,
+            spec.username,
+            spec.email,
+            spec.name,
+            directory,
+            spec.reflog,
+        )
+
+        # When extending, only generate the days after the current tip
+        after = None
+        checkpoint = None
+        if spec.resume:
+            # The checkpoint holds the range and tip the interrupted run started from
+            try:
+                checkpoint = read_checkpoint(directory, checkpoint_key)
+            except ValueError as e:
+                raise click.BadParameter(str(e)) from e
+        elif spec.extend:
+            after = git.head_timestamp()
+            if after is None:
+                raise click.BadParameter("Invalid directory. The repository to extend has no commits")
+
+            from_date = options.extended_from_date(from_date, spec.to_date, after)
+
+        # Every random choice is drawn from generators seeded here, so a seed always gives the same history
+        timestamp_seed, message_seed, churn_seed, topology_seed = np.random.SeedSequence(spec.seed).spawn(4)
+        timestamp_rng = np.random.default_rng(timestamp_seed)
+        message_rng = np.random.default_rng(message_seed)
+
+        churn = None
+        if spec.churn_files:
+            churn = Churn(git, np.random.default_rng(churn_seed), spec.churn_files, spec.churn_file_size, spec.churn_ratio)
+
+        topology = None
+        if spec.branches:
+            topology = Topology(git, np.random.default_rng(topology_seed), spec.branches, spec.branch_lifetime, spec.merge_probability)
+
+        if spec.progress:
+            # Time every stage and draw a live progress line
+            instrumentation.enable(Progress(from_date, spec.to_date))
+            instrument_git(git)
         else:
-            # Generate a commit message
-            message = generate_commit_message()
+            # An earlier run in the same process may have left it on
+            instrumentation.disable()
+
+        with profiled(spec.profile):
+            if spec.memory_limit or spec.checkpoint or spec.resume:
+                # Plan, render and write a few weeks at a time, within the memory limit and checkpointing as it goes
+                count = generate_streamed_history(
+                    git,
+                    spec.name,
+                    directory,
+                    from_date,
+                    spec.to_date,
+                    spec.memory_limit * 2**20,
+                    timestamp_rng,
+                    message_rng,
+                    vocabulary=spec.vocabulary,
+                    after=after,
+                    worktree=spec.worktree,
+                    churn=churn,
+                    topology=topology,
+                    checkpoint=spec.checkpoint,
+                    key=checkpoint_key,
+                    resume=checkpoint,
+                    min_days_per_week=spec.min_days_per_week,
+                    max_days_per_week=spec.max_days_per_week,
+                    include_weekends=spec.include_weekends,
+                    min_per_day=spec.min_per_day,
+                    max_per_day=spec.max_per_day,
+                    include_out_of_hours=spec.include_out_of_hours,
+                )
+            elif spec.shards > 1:
+                # Plan the shards in parallel then link them into one chain
+                count = generate_sharded_history(
+                    git,
+                    spec.name,
+                    directory,
+                    from_date,
+                    spec.to_date,
+                    spec.shards,
+                    spec.seed,
+                    vocabulary=spec.vocabulary,
+                    after=after,
+                    worktree=spec.worktree,
+                    churn=churn,
+                    topology=topology,
+                    min_days_per_week=spec.min_days_per_week,
+                    max_days_per_week=spec.max_days_per_week,
+                    include_weekends=spec.include_weekends,
+                    min_per_day=spec.min_per_day,
+                    max_per_day=spec.max_per_day,
+                    include_out_of_hours=spec.include_out_of_hours,
+                )
+            else:
+                # Plan the fake commits and write them as they're planned
+                plan = plan_commits(
+                    from_date,
+                    spec.to_date,
+                    min_days_per_week=spec.min_days_per_week,
+                    max_days_per_week=spec.max_days_per_week,
+                    include_weekends=spec.include_weekends,
+                    min_per_day=spec.min_per_day,
+                    max_per_day=spec.max_per_day,
+                    include_out_of_hours=spec.include_out_of_hours,
+                    timestamp_rng=timestamp_rng,
+                    message_rng=message_rng,
+                    vocabulary=spec.vocabulary,
+                    after=after,
+                )
+
+                count = apply_commits(git, spec.name, directory, plan, after, spec.worktree, churn, topology)
+
+            # Flush anything the backend is still holding on to
+            git.close()
+
+            # A range without a single commit never creates the repository, leaving nothing to finish
+            created = os.path.isdir(directory)
+
+            # Churn only writes objects, so the checked out templates are brought up to the generated tip
+            if created and churn is not None and spec.worktree:
+                git.checkout_head()
+
+            # So the generated history is fast to query without waiting for maintenance
+            if created and spec.commit_graph:
+                git.write_commit_graph()
+
+            if created and spec.bitmaps:
+                git.write_bitmaps()
+
+            # Only once everything is on disk, so a run dying before now can still be resumed
+            remove_checkpoint(directory)
+
+        # Read before publishing, as the writer points at wherever the repository was built
+        head = created and git.head() or None
+
+    if key is not None and created:
+        store(spec.cache_directory, key, spec.directory)
+
+    if spec.progress:
+        click.echo(instrumentation.summary(), err=True)
 
-            # Finally, commit it
-            git.commit(commit_timestamp, message)
+    return RunStats(spec.directory, count, head, time.perf_counter() - started)
 
 
 if __name__ == "__main__":
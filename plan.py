@@ -0,0 +1,46 @@
+import click
+
+import utils.options as options
+from utils.parameters import RunSpec
+
+
+@click.command()
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@options.PLAN.options
+def plan(output: str, spec: RunSpec) -> None:
+    """
+    Plan the commit schedule and stream it to OUTPUT without touching git.
+
+    OUTPUT must end in .jsonl, .parquet or .arrow, the latter two need pyarrow.
+    Apply the plan to a repository with apply.py.
+    """
+    # Imported once the parameters are checked, as numpy is the slowest part of starting up
+    import numpy as np
+
+    from actions.plan_commits import plan_commits, write_plan
+
+    # Seeded the same way as main, so a plan applies to the same history main would generate
+    timestamp_seed, message_seed = np.random.SeedSequence(spec.seed).spawn(2)
+
+    count = write_plan(
+        output,
+        plan_commits(
+            spec.from_date,
+            spec.to_date,
+            min_days_per_week=spec.min_days_per_week,
+            max_days_per_week=spec.max_days_per_week,
+            include_weekends=spec.include_weekends,
+            min_per_day=spec.min_per_day,
+            max_per_day=spec.max_per_day,
+            include_out_of_hours=spec.include_out_of_hours,
+            timestamp_rng=np.random.default_rng(timestamp_seed),
+            message_rng=np.random.default_rng(message_seed),
+            vocabulary=spec.vocabulary,
+        ),
+    )
+
+    click.echo(f"Planned {count} commits into {output}")
+
+
+if __name__ == "__main__":
+    plan()
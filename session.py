@@ -0,0 +1,70 @@
+import importlib
+from typing import Any, Iterable, List, Optional
+
+import main
+import utils.options as options
+from actions.create_repo import load_templates, template_tree_hash
+from actions.generate_commit_message import message_table
+from utils.config import Config
+from utils.instrumentation import RunStats
+from utils.parameters import RunSpec
+
+# Everything main.run imports lazily, as numpy is slow to import
+WARM_MODULES = [
+    "numpy",
+    "actions.generate_churn",
+    "actions.generate_sharded_history",
+    "actions.generate_streamed_history",
+    "actions.generate_topology",
+    "actions.plan_commits",
+]
+
+
+class Session(object):
+    """
+    Generates repositories in-process, keeping everything that's slow to set up warm between runs.
+
+    The first run of a process pays for importing numpy and the generators, compiling the
+    templates and rendering the commit message tables. A session pays for them once, when
+    it's created, so every run afterwards only costs its own commits. Random number
+    generators and writers stay per run, as each is seeded and pointed at its own repository.
+
+    Without a config, every parameter not given falls back to its default, see utils.config.load_config
+    to use .config.yaml. The message tables of vocabularies are rendered up front, None being the built
+    in words, and any others on first use.
+
+    For example:
+        session = Session()
+        stats = session.generate(session.spec(directory="fixtures/a", from_date="2024-01-01", seed=1))
+
+    Methods:
+        spec(**values: Any) -> RunSpec:
+            Resolves and checks the parameters of a run, falling back to the session's configuration then the defaults.
+
+        generate(spec: RunSpec) -> RunStats:
+            Generates a single repository.
+
+        generate_many(specs: Iterable[RunSpec]) -> List[RunStats]:
+            Generates every repository in turn, stopping at the first failure.
+    """
+
+    def __init__(self, config: Optional[Config] = None, vocabularies: Iterable[Optional[str]] = (None,)) -> None:
+        self.config = config
+
+        for module in WARM_MODULES:
+            importlib.import_module(module)
+
+        # Both are kept for the rest of the process, so every later run reuses them
+        load_templates(template_tree_hash())
+        for vocabulary in vocabularies:
+            message_table(vocabulary)
+
+    def spec(self, **values: Any) -> RunSpec:
+        # Never prompts, a session is driven by code rather than a person
+        return options.MAIN.build(self.config, False, **values)
+
+    def generate(self, spec: RunSpec) -> RunStats:
+        return main.run(spec)
+
+    def generate_many(self, specs: Iterable[RunSpec]) -> List[RunStats]:
+        return [self.generate(spec) for spec in specs]
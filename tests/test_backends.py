@@ -0,0 +1,66 @@
+import subprocess
+
+import pytest
+
+import main
+import utils.options as options
+from git.backends import BACKENDS
+
+# Enough days for several commits a day, weekends and out of hours, without taking long on the subprocess backend
+PARAMETERS = {
+    "username": "Test User",
+    "email": "test@example.com",
+    "name": "bathroom_tiles",
+    "from_date": "2024-01-01",
+    "to_date": "2024-01-31",
+    "seed": 1,
+    "commit_graph": False,
+    "progress": False,
+}
+
+
+def generate(directory: str, **values) -> str:
+    return main.run(options.MAIN.build(directory=directory, **{**PARAMETERS, **values})).head
+
+
+@pytest.mark.parametrize("memory_limit", [0, 64])
+def test_backends_agree(tmp_path, memory_limit):
+    # Every backend writes byte for byte the same commits, so the same seed always gives the same HEAD
+    heads = {backend: generate(str(tmp_path / backend), backend=backend, memory_limit=memory_limit) for backend in BACKENDS}
+
+    assert len(set(heads.values())) == 1, heads
+
+
+def test_messages_are_unquoted(tmp_path):
+    directory = str(tmp_path / "repository")
+    generate(directory, backend="subprocess")
+
+    messages = subprocess.run(["git", "log", "--format=%s"], cwd=directory, check=True, capture_output=True, text=True).stdout.splitlines()
+
+    assert messages[-1] == "feat: Initial commit"
+    assert not any(message.startswith("'") for message in messages)
+
+
+@pytest.mark.parametrize("values", [{}, {"shards": 4}, {"memory_limit": 64}])
+def test_empty_range_writes_nothing(tmp_path, values):
+    # A weekend, without weekends included
+    directory = tmp_path / "repository"
+    stats = main.run(options.MAIN.build(directory=str(directory), **{**PARAMETERS, "from_date": "2024-01-06", "to_date": "2024-01-07", "include_weekends": False, "backend": "pack", **values}))
+
+    assert stats.commits == 0
+    assert stats.head is None
+    assert not directory.exists()
+
+
+@pytest.mark.parametrize("reflog", [True, False])
+def test_plumbing_extend_logs_at_most_one_entry(tmp_path, reflog):
+    # `git commit` has already made the reflog, which update-ref would append a blank entry to every flush
+    directory = str(tmp_path / "repository")
+    generate(directory, backend="subprocess", to_date="2024-01-10")
+    generate(directory, backend="plumbing", to_date="2024-02-29", extend=True, reflog=reflog, memory_limit=64)
+
+    entries = subprocess.run(["git", "reflog", "show", "--format=%gs", "main"], cwd=directory, check=True, capture_output=True, text=True).stdout.splitlines()
+    generated = [entry for entry in entries if not entry.startswith("commit")]
+
+    assert generated == (reflog and [entries[0]] or [])
+    assert not reflog or entries[0].startswith("generate: ")
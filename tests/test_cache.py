@@ -0,0 +1,61 @@
+import os
+import subprocess
+
+import main
+import utils.options as options
+from utils.cache import _is_immutable
+
+
+def generate(directory: str, cache_directory: str) -> None:
+    main.run(
+        options.MAIN.build(
+            username="Test User",
+            email="test@example.com",
+            name="bathroom_tiles",
+            directory=directory,
+            from_date="2024-01-01",
+            to_date="2024-01-14",
+            seed=1,
+            backend="subprocess",
+            cache_directory=cache_directory,
+            progress=False,
+        )
+    )
+
+
+def git(directory: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=directory, capture_output=True, text=True)
+
+
+def test_restored_copies_are_independent(tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    original = str(tmp_path / "original")
+    restored = str(tmp_path / "restored")
+
+    generate(original, cache_directory)
+    generate(restored, cache_directory)
+
+    with open(os.path.join(original, "README.md")) as f:
+        readme = f.read()
+
+    # Edits to the worktree and a new commit, which appends to the reflogs in place
+    with open(os.path.join(restored, "README.md"), "a") as f:
+        f.write("hi\n")
+    assert git(restored, "-c", "user.name=Test User", "-c", "user.email=test@example.com", "commit", "-am", "edit").returncode == 0
+
+    [entry] = os.listdir(cache_directory)
+    for directory in (original, os.path.join(cache_directory, entry)):
+        with open(os.path.join(directory, "README.md")) as f:
+            assert f.read() == readme
+
+        fsck = git(directory, "fsck", "--strict")
+        assert fsck.returncode == 0 and not fsck.stderr, fsck.stderr
+
+
+def test_only_objects_are_shared():
+    assert _is_immutable(os.path.join("repository", ".git", "objects", "ab", "cdef0123"))
+    assert _is_immutable(os.path.join("repository", ".git", "objects", "pack", "pack-0123.pack"))
+    assert not _is_immutable(os.path.join("repository", ".git", "objects", "info", "commit-graph"))
+    assert not _is_immutable(os.path.join("repository", ".git", "logs", "HEAD"))
+    assert not _is_immutable(os.path.join("repository", ".git", "index"))
+    assert not _is_immutable(os.path.join("repository", "README.md"))
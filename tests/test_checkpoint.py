@@ -0,0 +1,47 @@
+import pytest
+
+import actions.generate_streamed_history as generate_streamed_history
+import main
+import utils.options as options
+
+PARAMETERS = {
+    "username": "Test User",
+    "email": "test@example.com",
+    "name": "bathroom_tiles",
+    "from_date": "2024-01-01",
+    "to_date": "2024-03-31",
+    "max_per_day": 6,
+    "seed": 1,
+    "checkpoint": 40,
+    "commit_graph": False,
+    "progress": False,
+}
+
+
+def generate(directory: str, **values) -> str:
+    return main.run(options.MAIN.build(directory=directory, **{**PARAMETERS, **values})).head
+
+
+@pytest.mark.parametrize("values", [{"backend": "subprocess"}, {"backend": "pack", "worktree": False, "churn_files": 2, "branches": 2}])
+def test_resume_after_the_initial_checkpoint(tmp_path, monkeypatch, values):
+    head = generate(str(tmp_path / "uninterrupted"), **values)
+
+    # Dies at the first checkpoint after the one made right after the initial commit
+    write_checkpoint = generate_streamed_history.write_checkpoint
+    written = []
+
+    def dying(directory, state):
+        if written:
+            raise RuntimeError("killed")
+        written.append(state)
+        write_checkpoint(directory, state)
+
+    directory = str(tmp_path / "interrupted")
+    monkeypatch.setattr(generate_streamed_history, "write_checkpoint", dying)
+    with pytest.raises(RuntimeError):
+        generate(directory, **values)
+
+    monkeypatch.setattr(generate_streamed_history, "write_checkpoint", write_checkpoint)
+
+    assert written[0]["commits"] == 1
+    assert generate(directory, resume=True, **values) == head
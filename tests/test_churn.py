@@ -0,0 +1,26 @@
+import subprocess
+
+import main
+import utils.options as options
+
+
+def test_worktree_matches_head(tmp_path):
+    directory = str(tmp_path / "repository")
+    main.run(
+        options.MAIN.build(
+            username="Test User",
+            email="test@example.com",
+            name="bathroom_tiles",
+            directory=directory,
+            from_date="2024-01-01",
+            to_date="2024-01-31",
+            seed=1,
+            backend="objects",
+            churn_files=3,
+            progress=False,
+        )
+    )
+
+    status = subprocess.run(["git", "status", "--porcelain"], cwd=directory, check=True, capture_output=True, text=True)
+
+    assert status.stdout == ""
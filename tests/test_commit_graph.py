@@ -0,0 +1,43 @@
+import os
+import subprocess
+
+import main
+import utils.options as options
+
+PARAMETERS = {
+    "username": "Test User",
+    "email": "test@example.com",
+    "name": "bathroom_tiles",
+    "from_date": "2024-01-01",
+    "to_date": "2024-03-31",
+    "seed": 1,
+    "backend": "pack",
+    "branches": 4,
+    "progress": False,
+}
+
+
+def git(directory: str, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=directory, check=True, capture_output=True, text=True).stdout
+
+
+def test_matches_git(tmp_path):
+    directory = str(tmp_path / "repository")
+    main.run(options.MAIN.build(directory=directory, **PARAMETERS))
+
+    path = os.path.join(directory, ".git", "objects", "info", "commit-graph")
+    with open(path, "rb") as f:
+        written = f.read()
+
+    # Merges of three or more parents spill into the EDGE chunk
+    assert int(git(directory, "rev-list", "--all", "--min-parents=3", "--count")) > 0
+    assert b"EDGE" in written[:64]
+
+    git(directory, "commit-graph", "verify")
+
+    # The same file git writes itself, with the generation numbers of version 1
+    os.remove(path)
+    git(directory, "-c", "commitGraph.generationVersion=1", "commit-graph", "write", "--reachable")
+
+    with open(path, "rb") as f:
+        assert f.read() == written
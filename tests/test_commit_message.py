@@ -0,0 +1,42 @@
+import click
+import numpy as np
+import pytest
+
+import actions.generate_commit_message as generate_commit_message
+import utils.options as options
+from actions.generate_commit_message import MessageTable, load_vocabulary
+
+
+def test_rendered_as_drawn_matches_table(monkeypatch):
+    words = load_vocabulary()
+    table = MessageTable(words)
+    assert table.messages is not None
+
+    monkeypatch.setattr(generate_commit_message, "MAX_TABLE_SIZE", 0)
+    parts = MessageTable(words)
+    assert parts.messages is None
+
+    assert table.draw(1000, np.random.default_rng(1)) == parts.draw(1000, np.random.default_rng(1))
+
+
+@pytest.mark.parametrize("size", [1000, 60000])
+def test_large_vocabulary_is_not_rendered(size):
+    table = MessageTable({key: [f"{key}{i}" for i in range(size)] for key in ("commit_types", "verbs", "nouns")} | {"templates": ["{verb} {noun}"] * size})
+    messages = table.draw(100, np.random.default_rng(1))
+
+    # Only the parts are kept, however many combinations there are, even more than fit in one index
+    assert table.size == size**4
+    assert table.messages is None
+    assert len(messages) == 100 and all(message.startswith("commit_types") for message in messages)
+
+
+@pytest.mark.parametrize("contents", ['templates: ["{verb} the {thing}"]', "templates: ['{} {noun}']", "- verbs\n- nouns\n"])
+def test_invalid_vocabulary_is_rejected_before_generating(tmp_path, contents):
+    path = tmp_path / "vocabulary.yaml"
+    path.write_text(contents)
+
+    with pytest.raises(ValueError):
+        load_vocabulary(str(path))
+
+    with pytest.raises(click.BadParameter, match="vocabulary"):
+        options.PLAN.build(vocabulary=str(path))
@@ -0,0 +1,40 @@
+import collections
+import datetime
+
+import numpy as np
+
+from actions.generate_commit_timestamps import generate_commit_schedule
+
+
+def schedule():
+    return generate_commit_schedule(
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 3, 31),
+        min_days_per_week=3,
+        max_days_per_week=5,
+        include_weekends=False,
+        min_per_day=1,
+        max_per_day=10,
+        include_out_of_hours=True,
+        rng=np.random.default_rng(1),
+    )
+
+
+def test_between():
+    timestamps = schedule()
+    from_date, to_date = datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)
+
+    expected = [at for at in timestamps.datetimes() if from_date <= at.date() <= to_date]
+
+    assert expected
+    assert list(timestamps.between(from_date, to_date).datetimes()) == expected
+
+
+def test_counts_per_day():
+    timestamps = schedule()
+
+    days, counts = timestamps.counts_per_day()
+    expected = collections.Counter(at.date() for at in timestamps.datetimes())
+
+    assert dict(zip(days.tolist(), counts.tolist())) == expected
+    assert counts.sum() == len(timestamps)
@@ -0,0 +1,50 @@
+import asyncio
+import subprocess
+
+import click
+import pytest
+
+import batch
+import main
+import utils.options as options
+
+PARAMETERS = {
+    "username": "Test User",
+    "email": "test@example.com",
+    "name": "bathroom_tiles",
+    "seed": 1,
+    "commit_graph": False,
+    "progress": False,
+}
+
+
+def test_min_days_per_week_fits_without_weekends():
+    with pytest.raises(click.BadParameter):
+        options.PLAN.build(min_days_per_week=6, max_days_per_week=7, include_weekends=False)
+
+    # The maximum is capped at the weekdays instead
+    options.PLAN.build(min_days_per_week=3, max_days_per_week=7, include_weekends=False)
+
+
+def test_extend_ignores_the_default_from_date(tmp_path):
+    directory = str(tmp_path / "repository")
+    main.run(options.MAIN.build(directory=directory, from_date="2024-01-01", to_date="2024-01-31", **PARAMETERS))
+
+    # The default from date is a year ago, long after this to date
+    main.run(options.MAIN.build(directory=directory, to_date="2024-02-29", extend=True, **PARAMETERS))
+
+    tip = subprocess.run(["git", "log", "-1", "--format=%ad", "--date=short"], cwd=directory, check=True, capture_output=True, text=True).stdout.strip()
+
+    assert "2024-02-01" <= tip <= "2024-02-29"
+
+
+def test_async_extend_ignores_the_default_from_date(tmp_path):
+    directory = str(tmp_path / "repository")
+    main.run(options.MAIN.build(directory=directory, from_date="2024-01-01", to_date="2024-01-31", **PARAMETERS))
+
+    spec = options.MAIN.build(directory=directory, to_date="2024-02-29", extend=True, **PARAMETERS)
+    assert asyncio.run(batch.generate_repository_async(spec, asyncio.Semaphore(4))) is None
+
+    tip = subprocess.run(["git", "log", "-1", "--format=%ad", "--date=short"], cwd=directory, check=True, capture_output=True, text=True).stdout.strip()
+
+    assert "2024-02-01" <= tip <= "2024-02-29"
@@ -0,0 +1,43 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from actions.plan_commits import plan_commits, read_plan, write_plan
+
+
+def plan() -> list:
+    return list(
+        plan_commits(
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 3, 31),
+            min_days_per_week=3,
+            max_days_per_week=5,
+            include_weekends=False,
+            min_per_day=1,
+            max_per_day=10,
+            include_out_of_hours=True,
+            timestamp_rng=np.random.default_rng(1),
+            message_rng=np.random.default_rng(2),
+        )
+    )
+
+
+def test_timestamps_are_seconds():
+    # Straight from the Schedule, without a datetime per commit
+    timestamps = [at for at, _ in plan()]
+
+    assert all(type(at) is int for at in timestamps)
+    assert timestamps == sorted(timestamps)
+
+
+@pytest.mark.parametrize("plan_format", ["jsonl", "parquet", "arrow"])
+def test_round_trip(tmp_path, plan_format):
+    if plan_format != "jsonl":
+        pytest.importorskip("pyarrow")
+
+    path = str(tmp_path / f"plan.{plan_format}")
+    planned = plan()
+
+    assert write_plan(path, planned) == len(planned)
+    assert list(read_plan(path)) == planned
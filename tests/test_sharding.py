@@ -0,0 +1,58 @@
+import subprocess
+
+import main
+import utils.options as options
+from utils.instrumentation import RunStats
+
+PARAMETERS = {
+    "username": "Test User",
+    "email": "test@example.com",
+    "name": "bathroom_tiles",
+    "from_date": "2024-01-01",
+    "to_date": "2024-03-31",
+    "seed": 1,
+    "backend": "pack",
+    "shards": 4,
+    "progress": False,
+}
+
+
+def generate(directory: str, **values) -> RunStats:
+    return main.run(options.MAIN.build(directory=directory, **{**PARAMETERS, **values}))
+
+
+def git(directory: str, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=directory, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_same_seed_same_head(tmp_path):
+    first = generate(str(tmp_path / "first"))
+    second = generate(str(tmp_path / "second"))
+
+    assert first.head == second.head
+    assert generate(str(tmp_path / "other"), seed=2).head != first.head
+
+
+def test_first_shard_without_commits(tmp_path):
+    # A week a shard, the first just a weekend without weekends included
+    directory = str(tmp_path / "repository")
+    stats = generate(directory, from_date="2024-01-06", shards=13, include_weekends=False)
+
+    assert stats.commits == int(git(directory, "rev-list", "--count", "HEAD")) > 0
+    assert git(directory, "log", "--reverse", "--format=%ad", "--date=short").splitlines()[0] >= "2024-01-08"
+    git(directory, "fsck", "--strict")
+
+
+def test_extend(tmp_path):
+    directory = str(tmp_path / "repository")
+    first = generate(directory, to_date="2024-01-31")
+    tip = git(directory, "log", "-1", "--format=%at")
+
+    second = generate(directory, extend=True)
+    dates = git(directory, "log", "--format=%at", f"{first.head}..HEAD").splitlines()
+
+    # Carried on from the tip in one chain, only after it
+    assert len(dates) == second.commits > 0
+    assert int(git(directory, "rev-list", "--count", "HEAD")) == first.commits + second.commits
+    assert min(int(date) for date in dates) > int(tip)
+    git(directory, "fsck", "--strict")
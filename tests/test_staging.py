@@ -0,0 +1,48 @@
+import os
+import subprocess
+
+import pytest
+
+import main
+import utils.options as options
+from git.objects import ObjectStoreGit
+from utils.instrumentation import RunStats
+
+PARAMETERS = {
+    "username": "Test User",
+    "email": "test@example.com",
+    "name": "bathroom_tiles",
+    "from_date": "2024-01-01",
+    "to_date": "2024-01-31",
+    "seed": 1,
+    "backend": "pack",
+    "progress": False,
+}
+
+
+def generate(tmp_path, **values) -> RunStats:
+    return main.run(options.MAIN.build(directory=str(tmp_path / "repository"), staging_directory=str(tmp_path / "staging"), **{**PARAMETERS, **values}))
+
+
+def test_failed_run_leaves_nothing(tmp_path, monkeypatch):
+    # Fails once the repository has been written in the scratch directory, before it's published
+    def failing(self):
+        raise RuntimeError("killed")
+
+    monkeypatch.setattr(ObjectStoreGit, "write_commit_graph", failing)
+
+    with pytest.raises(RuntimeError, match="killed"):
+        generate(tmp_path)
+
+    assert not (tmp_path / "repository").exists()
+    assert os.listdir(tmp_path / "staging") == []
+
+
+def test_finished_run_is_published_whole(tmp_path):
+    stats = generate(tmp_path)
+    directory = str(tmp_path / "repository")
+
+    assert os.listdir(tmp_path / "staging") == []
+    assert subprocess.run(["git", "rev-parse", "HEAD"], cwd=directory, check=True, capture_output=True, text=True).stdout.strip() == stats.head
+    assert os.path.isfile(os.path.join(directory, ".git", "objects", "info", "commit-graph"))
+    subprocess.run(["git", "fsck", "--strict"], cwd=directory, check=True, capture_output=True)
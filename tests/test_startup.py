@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ["main.py", "plan.py", "apply.py", "batch.py"]
+
+# Most of a cold start, so only the commands which need them may load them, see benchmark.py for the time budget
+HEAVY_MODULES = ["numpy", "asyncio", "yaml"]
+
+
+def start(script: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-X", "importtime", script, "--help"], cwd=ROOT, check=True, capture_output=True, text=True)
+
+
+@pytest.mark.parametrize("script", ENTRY_POINTS)
+def test_heavy_modules_are_imported_lazily(script):
+    imported = [line.rsplit("|", 1)[-1].strip() for line in start(script).stderr.splitlines()]
+
+    assert not set(HEAVY_MODULES) & set(imported)
@@ -0,0 +1,12 @@
+from benchmark import bench_stream, run_isolated
+
+# Enough commits that the writer has to be flushed several times to stay within the limit
+YEARS = 8
+MEMORY_LIMIT = 80
+
+
+def test_peak_rss_stays_under_memory_limit():
+    # A fresh interpreter, so the peak is this run's alone
+    result = run_isolated(bench_stream, YEARS, MEMORY_LIMIT, 0, "pack")
+
+    assert 0 < result["peak_rss_kb"] < MEMORY_LIMIT * 1024
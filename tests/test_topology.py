@@ -0,0 +1,43 @@
+import subprocess
+
+import pytest
+
+import main
+import utils.options as options
+
+PARAMETERS = {
+    "username": "Test User",
+    "email": "test@example.com",
+    "name": "bathroom_tiles",
+    "from_date": "2024-01-01",
+    "to_date": "2024-03-31",
+    "seed": 1,
+    "backend": "pack",
+    "branches": 4,
+    "progress": False,
+}
+
+
+def git(directory: str, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=directory, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.mark.parametrize("memory_limit", [0, 64])
+def test_branches_merge_and_are_deleted(tmp_path, memory_limit):
+    directory = str(tmp_path / "repository")
+    main.run(options.MAIN.build(directory=directory, memory_limit=memory_limit, **PARAMETERS))
+
+    git(directory, "fsck", "--strict")
+
+    # Branches which finished together are merged together
+    assert int(git(directory, "rev-list", "--count", "--min-parents=3", "main")) > 0
+
+    # Merged branches are deleted, leaving only those still open or waiting to be merged
+    remaining = git(directory, "for-each-ref", "--format=%(refname)", "refs/heads/feature/").split()
+    merged = git(directory, "for-each-ref", "--merged=main", "--format=%(objectname)", "refs/heads/feature/").split()
+
+    # Only a branch without a commit of its own yet is reachable from main, still where it forked
+    forks = set(git(directory, "rev-list", "--first-parent", "main").split())
+
+    assert len(remaining) >= PARAMETERS["branches"]
+    assert set(merged) <= forks
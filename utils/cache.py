@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Dict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Bump whenever the generated output changes for the same parameters
+CACHE_VERSION = 3
+
+# The Linux ioctl cloning a file's extents, copy-on-write, on btrfs, XFS and the like
+FICLONE = 0x40049409
+
+# Files under .git/objects/pack which are written once, named after their contents, and never edited
+PACK_SUFFIXES = (".pack", ".idx", ".rev", ".bitmap")
+
+
+def hash_tree(directory: str) -> str:
+    """
+    Hash the relative paths and contents of every file under a directory.
+
+    Args:
+        directory (str): The directory to hash.
+
+    Returns:
+        str: The hex sha256 of the directory's contents.
+    """
+    digest = hashlib.sha256()
+
+    for root, directories, files in os.walk(directory):
+        # Walk in a stable order so the hash doesn't depend on the filesystem
+        directories.sort()
+
+        for file in sorted(files):
+            path = os.path.join(root, file)
+            digest.update(os.path.relpath(path, directory).encode() + b"\0")
+            digest.update(bytes.fromhex(hash_file(path)))
+
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """
+    Hash the contents of a file.
+
+    Args:
+        path (str): The file to hash.
+
+    Returns:
+        str: The hex sha256 of the file's contents.
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def cache_key(parameters: Dict[str, Any]) -> str:
+    """
+    Derive the content address of a repository from everything that determines its contents.
+
+    Args:
+        parameters (Dict[str, Any]): The resolved parameters, including the seed.
+
+    Returns:
+        str: The hex sha256 key for the repository.
+    """
+    payload = json.dumps(
+        {
+            "version": CACHE_VERSION,
+            "parameters": parameters,
+        },
+        sort_keys=True,
+        default=str,
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _is_immutable(path: str) -> bool:
+    # Loose objects and packs are only ever written whole, then deleted, never edited in place
+    directory, file = os.path.split(path)
+    objects, name = os.path.split(directory)
+
+    if os.path.basename(objects) != "objects" or os.path.basename(os.path.dirname(objects)) != ".git":
+        return False
+
+    if name == "pack":
+        return file.startswith("pack-") and file.endswith(PACK_SUFFIXES)
+
+    return len(name) == 2 and all(c in "0123456789abcdef" for c in name)
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    # Everything else, the worktree, index, refs and reflogs, is edited in place by git or the user,
+    # so sharing an inode would leak every change into the cache and every other restored copy
+    if _is_immutable(source):
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as s, open(destination, "wb") as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+            shutil.copystat(source, destination)
+            return
+        except OSError:
+            pass
+
+    shutil.copy2(source, destination)
+
+
+def restore(cache_directory: str, key: str, directory: str) -> bool:
+    """
+    Populate a directory from the cache, if the repository has already been built.
+
+    Args:
+        cache_directory (str): The directory holding cached repositories.
+        key (str): The key of the repository.
+        directory (str): The directory to create the repository in.
+
+    Returns:
+        bool: True if the repository was restored, False if it isn't cached.
+    """
+    entry = os.path.join(cache_directory, key)
+    if not os.path.isdir(entry):
+        return False
+
+    try:
+        shutil.copytree(entry, directory, symlinks=True, copy_function=_link_or_copy)
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred while restoring {key} from the cache: {str(e)}") from e
+
+    return True
+
+
+def store(cache_directory: str, key: str, directory: str) -> None:
+    """
+    Add a finished repository to the cache.
+
+    Args:
+        cache_directory (str): The directory holding cached repositories.
+        key (str): The key of the repository.
+        directory (str): The directory of the finished repository.
+    """
+    entry = os.path.join(cache_directory, key)
+    if os.path.isdir(entry):
+        return
+
+    # Copy alongside the entry then rename, so a concurrent reader never sees a partial repository
+    temporary_entry = os.path.join(cache_directory, f".{key}.{uuid.uuid4().hex}")
+
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        shutil.copytree(directory, temporary_entry, symlinks=True, copy_function=_link_or_copy)
+        os.rename(temporary_entry, entry)
+    except OSError:
+        # Someone else finished the same repository first
+        shutil.rmtree(temporary_entry, ignore_errors=True)
+        if not os.path.isdir(entry):
+            raise RuntimeError(f"Failed to store {key} in the cache")
+    except Exception as e:
+        shutil.rmtree(temporary_entry, ignore_errors=True)
+        raise RuntimeError(f"An unexpected error occurred while storing {key} in the cache: {str(e)}") from e
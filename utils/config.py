@@ -1,5 +1,8 @@
-from typing import Any
-import yaml
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+# Read from the working directory, the same as the scripts are run from
+CONFIG_PATH = ".config.yaml"
 
 
 class Config(object):
@@ -26,14 +29,48 @@ class Config(object):
                 key (str): The key to check for existence.
             Returns:
                 bool: True if the key exists, False otherwise.
+
+        parsed(key: str, parser: Callable) -> Any:
+            Retrieves the value associated with the given key, parsed and validated only the first time it's asked for.
+            Args:
+                key (str): The key to look up in the configuration data.
+                parser (Callable): The parser for the value, see utils.parsing.
+            Returns:
+                Any: The parsed value.
     """
 
-    def __init__(self):
-        with open(".config.yaml", "r") as file:
-            self.data = yaml.safe_load(file)
+    def __init__(self, path: str = CONFIG_PATH):
+        # Imported here as yaml is slow to import and only needed once the config is read
+        import yaml
+
+        with open(path, "r") as file:
+            self.data = yaml.safe_load(file) or {}
+
+        self.parsed_values: Dict[str, Any] = {}
 
     def __getitem__(self, key: str) -> Any:
         return self.data.get(key)
 
     def __contains__(self, key: str) -> bool:
         return key in self.data
+
+    def parsed(self, key: str, parser: Callable) -> Any:
+        # Every run in a process shares the configuration, so each value is only validated once
+        if key not in self.parsed_values:
+            self.parsed_values[key] = parser(self.data[key])
+
+        return self.parsed_values[key]
+
+
+@lru_cache(maxsize=None)
+def load_config(path: str = CONFIG_PATH) -> Config:
+    """
+    Load a configuration file once per process, sharing it with every later run.
+
+    Args:
+        path (str): The configuration file to load.
+
+    Returns:
+        Config: The loaded configuration.
+    """
+    return Config(path)
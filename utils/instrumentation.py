@@ -0,0 +1,329 @@
+import datetime
+import inspect
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Generator, List, Optional, Sequence, TextIO, Union
+
+from git.dates import to_seconds
+
+
+class Progress(object):
+    """
+    A live progress line showing commits written, commits per second and an ETA.
+
+    Generation walks forward through the date range, so the ETA is estimated from how
+    far through the range the last written commit is.
+
+    Methods:
+        advance(at: Union[datetime.datetime, int], commits: int = 1) -> None:
+            Records commits written up to a timestamp, or naive local seconds, redrawing the line at most every interval.
+
+        finish() -> None:
+            Draws the final line and moves on to a new one.
+    """
+
+    def __init__(self, from_date: datetime.date, to_date: datetime.date, interval: float = 0.5, stream: TextIO = sys.stderr) -> None:
+        # In seconds, the same as the Schedule the commits come from
+        self.start = to_seconds(datetime.datetime.combine(from_date, datetime.time()))
+        self.span = to_seconds(datetime.datetime.combine(to_date, datetime.time())) + 86400 - self.start
+        self.interval = interval
+        self.stream = stream
+        self.commits = 0
+        self.fraction = 0.0
+        self.started = time.perf_counter()
+        self.drawn = 0.0
+
+    def advance(self, at: Union[datetime.datetime, int], commits: int = 1) -> None:
+        if isinstance(at, datetime.datetime):
+            at = to_seconds(at)
+
+        self.commits += commits
+        self.fraction = min(1.0, max(0.0, (at - self.start) / self.span))
+
+        now = time.perf_counter()
+        if now - self.drawn >= self.interval:
+            self.drawn = now
+            self._draw(now)
+
+    def finish(self) -> None:
+        self._draw(time.perf_counter())
+        self.stream.write("\n")
+        self.stream.flush()
+
+    def _draw(self, now: float) -> None:
+        elapsed = now - self.started
+        rate = elapsed and self.commits / elapsed or 0.0
+
+        eta = "--:--:--"
+        if self.fraction > 0:
+            eta = str(datetime.timedelta(seconds=int(elapsed / self.fraction - elapsed)))
+
+        self.stream.write(f"\r{self.fraction:7.2%}  {self.commits:>12,} commits  {rate:>12,.0f} commits/s  ETA {eta}  ")
+        self.stream.flush()
+
+
+class Instrumentation(object):
+    """
+    Timers and counters for each generation stage, off by default so they cost nothing unless enabled.
+
+    Methods:
+        enable(progress: Optional[Progress] = None) -> None:
+            Starts recording afresh, optionally drawing a live progress line.
+
+        disable() -> None:
+            Stops recording, so later runs in the same process cost nothing again.
+
+        timer(name: str) -> contextmanager:
+            Times the enclosed block under the given name.
+
+        advance(at: Union[datetime.datetime, int], commits: int = 1) -> None:
+            Counts commits written up to a timestamp, updating the progress line.
+
+        summary() -> str:
+            Formats every timer and counter for display.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.progress: Optional[Progress] = None
+        self.timers: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.perf_counter()
+
+    def enable(self, progress: Optional[Progress] = None) -> None:
+        self.enabled = True
+        self.progress = progress
+        self.timers = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.progress = None
+
+    def record(self, name: str, seconds: float) -> None:
+        timer = self.timers.setdefault(name, [0, 0.0])
+        timer[0] += 1
+        timer[1] += seconds
+
+    @contextmanager
+    def timer(self, name: str) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def advance(self, at: Union[datetime.datetime, int], commits: int = 1) -> None:
+        if not self.enabled:
+            return
+
+        self.count("commits", commits)
+        if self.progress is not None:
+            self.progress.advance(at, commits)
+
+    def summary(self) -> str:
+        if self.progress is not None:
+            self.progress.finish()
+
+        elapsed = time.perf_counter() - self.started
+        commits = self.counters.get("commits", 0)
+
+        lines = [f"{commits:,} commits in {elapsed:.2f}s ({elapsed and commits / elapsed or 0:,.0f} commits/s)", ""]
+        lines.append(f"{'stage':<32} {'calls':>12} {'total':>10} {'mean':>12} {'share':>7}")
+
+        # Slowest first, so the bottleneck is at the top
+        for name, (calls, total) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<32} {calls:>12,} {total:>9.2f}s {total / calls * 1e6:>10.1f}us {elapsed and total / elapsed or 0:>7.1%}")
+
+        for name, value in sorted(self.counters.items()):
+            if name != "commits":
+                lines.append(f"{name:<32} {value:>12,}")
+
+        return "\n".join(lines)
+
+
+# Shared by every instrumented stage
+instrumentation = Instrumentation()
+
+
+class RunStats(object):
+    """
+    What a single run generated, returned by main.run.
+
+    Attributes:
+        directory (str): The directory of the repository.
+        commits (Optional[int]): The number of commits written, or None if the repository was restored from the cache.
+        head (Optional[str]): The commit the repository's branch points at, or None if the range had no commits to write.
+        seconds (float): How long the run took.
+        restored (bool): Whether the repository was restored from the cache rather than generated.
+    """
+
+    def __init__(self, directory: str, commits: Optional[int], head: Optional[str], seconds: float, restored: bool = False) -> None:
+        self.directory = directory
+        self.commits = commits
+        self.head = head
+        self.seconds = seconds
+        self.restored = restored
+
+    def __repr__(self) -> str:
+        return f"RunStats(directory={self.directory!r}, commits={self.commits!r}, head={self.head!r}, seconds={self.seconds:.3f}, restored={self.restored!r})"
+
+
+def instrument(name: str) -> Callable:
+    """
+    A decorator which times every call of a function or coroutine, or every step of a generator, while instrumentation is enabled.
+
+    Args:
+        name (str): The name to record the timings under.
+
+    Returns:
+        Callable: A decorator function that wraps the target function.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not instrumentation.enabled:
+                    yield from func(*args, **kwargs)
+                    return
+
+                # Only time spent producing each item counts, not the consumer's work in between
+                generator = func(*args, **kwargs)
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        instrumentation.record(name, time.perf_counter() - start)
+                        return
+                    instrumentation.record(name, time.perf_counter() - start)
+
+                    yield item
+
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def coroutine_wrapper(*args, **kwargs):
+                if not instrumentation.enabled:
+                    return await func(*args, **kwargs)
+
+                # Includes time spent waiting, which is what a caller awaiting it sees
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    instrumentation.record(name, time.perf_counter() - start)
+
+            return coroutine_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instrumentation.record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+# The writer methods worth timing, across every backend
+GIT_METHODS = ("init", "stage", "commit", "commit_serialized", "write_object", "update_ref", "flush", "close", "checkout_head", "write_commit_graph", "write_bitmaps")
+
+
+def instrument_git(git: object, methods: Sequence[str] = GIT_METHODS) -> None:
+    """
+    Time the methods of a Git writer, whichever backend it is.
+
+    Args:
+        git (object): The writer to instrument.
+        methods (Sequence[str]): The methods to time, any the backend doesn't have are skipped.
+    """
+    for method in methods:
+        if hasattr(git, method):
+            setattr(git, method, instrument(f"git.{method}")(getattr(git, method)))
+
+
+def peak_rss() -> int:
+    """
+    Get the peak resident set size of this process so far.
+
+    Returns:
+        int: The peak RSS in bytes, or 0 where the platform can't report it.
+    """
+    # Linux carries ru_maxrss over from the parent through fork and exec, so a spawned process would start at its parent's peak
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    return sys.platform == "darwin" and peak or peak * 1024
+
+
+@contextmanager
+def profiled(path: Optional[str]) -> Generator[None, None, None]:
+    """
+    Profile the enclosed block, writing the result to a file.
+
+    Paths ending in .html are profiled with pyinstrument, if it's installed, anything
+    else is written as cProfile stats for pstats or snakeviz.
+
+    Args:
+        path (Optional[str]): The file to write the profile to, or None to not profile.
+    """
+    if path is None:
+        yield
+        return
+
+    if path.endswith(".html"):
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise RuntimeError("HTML profiles need pyinstrument to be installed") from e
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path, "w") as f:
+                f.write(profiler.output_html())
+
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
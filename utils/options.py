@@ -0,0 +1,418 @@
+import datetime
+import random
+import re
+
+from typing import Any, Callable, Dict, Optional
+
+import click
+
+from utils.parameters import Parameter, Schema
+import utils.parsing as parsing
+from git.backends import BACKENDS
+from git.objects import ObjectStoreGit
+from git.config import get_user_name, get_user_email
+
+# Every parameter is declared once here, then grouped into the schema of each command at the end
+
+username = Parameter(
+    config_key="username",
+    description="the name of user who should be attributed to the commits",
+    default=get_user_name,
+    parser=parsing.parse_string(re.compile(r"^.*$")),  # Just a username, doesn't have to match anything?
+)
+
+email = Parameter(
+    config_key="email",
+    description="the email of user who should be attributed to the commits",
+    default=get_user_email,
+    parser=parsing.parse_string(re.compile(r"^.*@.*$")),  # Don't fight email addresses, you won't win
+)
+
+name = Parameter(
+    config_key="name",
+    description="the name of the new repository",
+    default=lambda: "bathroom_tiles",
+    parser=parsing.parse_string(re.compile(r"^[a-zA-Z0-9_\-.]{1,100}$")),
+)
+
+directory = Parameter(
+    config_key="directory",
+    description="the directory where the repository will be created",
+    default=lambda: "./bathroom_tiles",
+    parser=parsing.parse_directory(),
+)
+
+from_date = Parameter(
+    config_key="from_date",
+    description="the date from which the commits should be attributed in iso8601 format",
+    default=lambda: (datetime.date.today() - datetime.timedelta(weeks=52, days=1)).isoformat(),
+    parser=parsing.parse_date(min=datetime.date(1970, 1, 1), max=datetime.date.today()),
+)
+
+to_date = Parameter(
+    config_key="to_date",
+    description="the date to which the commits should be attributed in iso8601 format",
+    default=lambda: (datetime.date.today() - datetime.timedelta(days=1)).isoformat(),
+    parser=parsing.parse_date(min=datetime.date(1970, 1, 1), max=datetime.date.today()),
+)
+
+min_days_per_week = Parameter(
+    config_key="min_days_per_week",
+    description="the minimum number of days per week",
+    default=lambda: 3,
+    parser=parsing.parse_int(min=1, max=7),
+)
+
+max_days_per_week = Parameter(
+    config_key="max_days_per_week",
+    description="the maximum number of days per week",
+    default=lambda: 5,
+    parser=parsing.parse_int(min=1, max=7),
+)
+
+include_weekends = Parameter(
+    config_key="include_weekends",
+    description="whether to include weekends in commit generation (true/false)",
+    default=lambda: False,
+    parser=parsing.parse_bool(),
+)
+
+min_per_day = Parameter(
+    config_key="min_per_day",
+    description="the minimum number of commits per day",
+    default=lambda: 1,
+    parser=parsing.parse_int(min=1, max=1000),
+)
+
+max_per_day = Parameter(
+    config_key="max_per_day",
+    description="the maximum number of commits per day",
+    default=lambda: 10,
+    parser=parsing.parse_int(min=1, max=1000),
+)
+
+include_out_of_hours = Parameter(
+    config_key="include_out_of_hours",
+    description="whether to include out-of-hours commits (true/false)",
+    default=lambda: True,
+    parser=parsing.parse_bool(),
+)
+
+backend = Parameter(
+    config_key="backend",
+    description=f"the backend used to write the commits ({'/'.join(BACKENDS)})",
+    default=lambda: "fast-import",
+    parser=parsing.parse_choice(list(BACKENDS)),
+)
+
+seed = Parameter(
+    config_key="seed",
+    description="the seed for the random number generators, the same seed reproduces the same repository",
+    default=lambda: random.SystemRandom().randrange(2**32),
+    parser=parsing.parse_int(min=0, max=2**64 - 1),
+)
+
+cache_directory = Parameter(
+    config_key="cache_directory",
+    description="the directory to cache finished repositories in, empty to disable caching",
+    default=lambda: "",
+    parser=parsing.parse_optional(parsing.parse_string(re.compile(r"^.+$"))),
+)
+
+staging_directory = Parameter(
+    config_key="staging_directory",
+    description="a scratch directory on a fast disk, e.g. /dev/shm, to build new repositories in before moving them into place whole, empty to build in place",
+    default=lambda: "",
+    parser=parsing.parse_optional(parsing.parse_string(re.compile(r"^.+$"))),
+)
+
+shards = Parameter(
+    config_key="shards",
+    description="the number of date range shards to plan in parallel, 1 to plan in a single process",
+    default=lambda: 1,
+    parser=parsing.parse_int(min=1, max=4096),
+)
+
+extend = Parameter(
+    config_key="extend",
+    description="whether to extend an existing generated repository up to the to date (true/false)",
+    default=lambda: False,
+    parser=parsing.parse_bool(),
+)
+
+worktree = Parameter(
+    config_key="worktree",
+    description="whether to check the templates out into the worktree (true/false), false writes them straight into objects with the objects/pack backends",
+    default=lambda: True,
+    parser=parsing.parse_bool(),
+)
+
+churn_files = Parameter(
+    config_key="churn_files",
+    description="the number of files to modify, add or delete in each commit with the objects/pack backends, 0 for empty commits",
+    default=lambda: 0,
+    parser=parsing.parse_int(min=0, max=1000000),
+)
+
+churn_file_size = Parameter(
+    config_key="churn_file_size",
+    description="the mean size in bytes of each modified or added file",
+    default=lambda: 4096,
+    parser=parsing.parse_int(min=1, max=2**30),
+)
+
+churn_ratio = Parameter(
+    config_key="churn_ratio",
+    description="the ratio of modified:added:deleted files",
+    default=lambda: "6:3:1",
+    parser=parsing.parse_ratio(parts=3),
+)
+
+branches = Parameter(
+    config_key="branches",
+    description="the number of feature branches open at once with the objects/pack backends, 0 for a linear history",
+    default=lambda: 0,
+    parser=parsing.parse_int(min=0, max=100000),
+)
+
+branch_lifetime = Parameter(
+    config_key="branch_lifetime",
+    description="the mean number of commits on each feature branch before it's merged",
+    default=lambda: 5,
+    parser=parsing.parse_int(min=1, max=1000000),
+)
+
+merge_probability = Parameter(
+    config_key="merge_probability",
+    description="the chance of each main branch commit merging every finished feature branch, as an octopus merge if there are several",
+    default=lambda: 0.5,
+    parser=parsing.parse_float(min=0, max=1),
+)
+
+memory_limit = Parameter(
+    config_key="memory_limit",
+    description="the peak memory in MiB to stay within by generating a few weeks at a time, 0 to generate the whole range at once",
+    default=lambda: 0,
+    parser=parsing.parse_int(min=0, max=2**30),
+)
+
+checkpoint = Parameter(
+    config_key="checkpoint",
+    description="the number of commits between checkpoints an interrupted run can be resumed from, streaming a few weeks at a time, 0 to not checkpoint",
+    default=lambda: 0,
+    parser=parsing.parse_int(min=0, max=2**31),
+)
+
+resume = Parameter(
+    config_key="resume",
+    description="whether to carry on an interrupted run from its last checkpoint, given the same parameters (true/false)",
+    default=lambda: False,
+    parser=parsing.parse_bool(),
+)
+
+commit_graph = Parameter(
+    config_key="commit_graph",
+    description="whether to write a commit-graph file once the history is generated (true/false)",
+    default=lambda: True,
+    parser=parsing.parse_bool(),
+)
+
+bitmaps = Parameter(
+    config_key="bitmaps",
+    description="whether to repack with a multi-pack-index and reachability bitmaps once the history is generated (true/false)",
+    default=lambda: False,
+    parser=parsing.parse_bool(),
+)
+
+reflog = Parameter(
+    config_key="reflog",
+    description="whether to log the branch's update with one reflog entry for the whole run with the plumbing/objects/pack backends (true/false), the others always log",
+    default=lambda: False,
+    parser=parsing.parse_bool(),
+)
+
+progress = Parameter(
+    config_key="progress",
+    description="whether to show a live progress line and a per stage timing summary (true/false)",
+    default=lambda: False,
+    parser=parsing.parse_bool(),
+)
+
+profile = Parameter(
+    config_key="profile",
+    description="the file to write a cProfile dump to, or pyinstrument for .html, empty to not profile",
+    default=lambda: "",
+    parser=parsing.parse_optional(parsing.parse_string(re.compile(r"^.+$"))),
+)
+
+vocabulary = Parameter(
+    config_key="vocabulary",
+    description="a YAML file of commit_types, verbs, nouns and templates to build messages from, empty for the built in words",
+    default=lambda: "",
+    parser=parsing.parse_optional(parsing.parse_vocabulary()),
+)
+
+
+def ordered(low: str, high: str, unless: Optional[str] = None) -> Callable[[Dict[str, Any]], None]:
+    """
+    Creates a check that one parameter is no greater than another, e.g. min_per_day <= max_per_day.
+
+    Args:
+        low (str): The parameter which must be no greater.
+        high (str): The parameter which must be no less.
+        unless (Optional[str]): A parameter which, when set, skips the check.
+
+    Returns:
+        Callable: A function that checks resolved parameter values.
+    """
+
+    def check(values: Dict[str, Any]) -> None:
+        if unless is not None and values.get(unless):
+            return
+
+        if low in values and high in values and values[low] > values[high]:
+            raise click.BadParameter(f"Invalid value for {low}: must be no greater than {high}, {values[low]} > {values[high]}")
+
+    return check
+
+
+def needs_object_store(key: str, used: Callable[[Any], bool], message: str) -> Callable[[Dict[str, Any]], None]:
+    """
+    Creates a check that a feature is only used with the objects/pack backends.
+
+    Args:
+        key (str): The parameter which turns the feature on.
+        used (Callable[[Any], bool]): Whether the parameter's value uses the feature.
+        message (str): The error message when it's used with another backend.
+
+    Returns:
+        Callable: A function that checks resolved parameter values.
+    """
+
+    def check(values: Dict[str, Any]) -> None:
+        if key in values and "backend" in values and used(values[key]) and not issubclass(BACKENDS[values["backend"]], ObjectStoreGit):
+            raise click.BadParameter(message)
+
+    return check
+
+
+def check_weekdays(values: Dict[str, Any]) -> None:
+    """
+    Check the minimum days per week can be met without weekends, when they're excluded. The maximum is
+    capped at the five weekdays instead, so the defaults hold either way.
+
+    Args:
+        values (Dict[str, Any]): The resolved parameter values.
+    """
+    if not values.get("include_weekends", True) and values.get("min_days_per_week", 0) > 5:
+        raise click.BadParameter(f"Invalid value for min_days_per_week: must be no greater than 5 without weekends, got {values['min_days_per_week']}")
+
+
+def check_staging(values: Dict[str, Any]) -> None:
+    """
+    Check a staging directory isn't combined with extending or checkpoints, as only new repositories
+    are built elsewhere, and a failed build's scratch copy is removed along with its checkpoint.
+
+    Args:
+        values (Dict[str, Any]): The resolved parameter values.
+    """
+    if values.get("staging_directory") and values.get("extend"):
+        raise click.BadParameter("A staging directory builds new repositories elsewhere, so can't be combined with extend")
+
+    if values.get("staging_directory") and (values.get("checkpoint") or values.get("resume")):
+        raise click.BadParameter("A staging directory is removed when a build fails, so can't be combined with checkpoint or resume")
+
+
+def check_streaming(values: Dict[str, Any]) -> None:
+    """
+    Check a memory limit or checkpoints aren't combined with shards, or resume with extend, as streaming
+    plans the range a few weeks at a time in one process, and resuming carries on from the checkpoint.
+
+    Args:
+        values (Dict[str, Any]): The resolved parameter values.
+    """
+    if values.get("memory_limit") and values.get("shards", 1) > 1:
+        raise click.BadParameter("A memory limit streams the range a few weeks at a time, so can't be combined with shards")
+
+    if (values.get("checkpoint") or values.get("resume")) and values.get("shards", 1) > 1:
+        raise click.BadParameter("Checkpoints are made while streaming the range a few weeks at a time, so can't be combined with shards")
+
+    if values.get("resume") and values.get("extend"):
+        raise click.BadParameter("Resuming carries on from the checkpoint rather than the tip, so can't be combined with extend")
+
+
+def extended_from_date(from_date: datetime.date, to_date: datetime.date, after: datetime.datetime) -> datetime.date:
+    """
+    Choose where extending a repository starts, as the from_date <= to_date check is skipped when extending.
+
+    Args:
+        from_date (datetime.date): The resolved from date.
+        to_date (datetime.date): The resolved to date.
+        after (datetime.datetime): The timestamp of the tip being extended.
+
+    Returns:
+        datetime.date: The later of the from date and the tip's date, or the tip's date when the from date
+            is past the to date, as that's the default one left behind by an older to date.
+    """
+    return from_date <= to_date and max(from_date, after.date()) or after.date()
+
+
+SCHEDULE_CHECKS = [
+    # Extending starts from the tip instead, so the default from date can be after an earlier to date
+    ordered("from_date", "to_date", unless="extend"),
+    ordered("min_days_per_week", "max_days_per_week"),
+    ordered("min_per_day", "max_per_day"),
+    check_weekdays,
+]
+
+WRITER_CHECKS = [
+    needs_object_store("worktree", lambda worktree: not worktree, "Skipping the worktree needs an object store backend (objects/pack)"),
+    needs_object_store("churn_files", bool, "Churning files needs an object store backend (objects/pack)"),
+    needs_object_store("branches", bool, "Feature branches need an object store backend (objects/pack)"),
+    needs_object_store("shards", lambda shards: shards > 1, "Sharded generation needs an object store backend (objects/pack)"),
+    check_staging,
+]
+
+# The schedule of commits, shared by everything which plans them
+SCHEDULE = [from_date, to_date, min_days_per_week, max_days_per_week, include_weekends, min_per_day, max_per_day, include_out_of_hours]
+
+MAIN = Schema(
+    [
+        username,
+        email,
+        name,
+        directory,
+        *SCHEDULE,
+        backend,
+        seed,
+        cache_directory,
+        staging_directory,
+        shards,
+        extend,
+        worktree,
+        churn_files,
+        churn_file_size,
+        churn_ratio,
+        branches,
+        branch_lifetime,
+        merge_probability,
+        memory_limit,
+        checkpoint,
+        resume,
+        commit_graph,
+        bitmaps,
+        reflog,
+        progress,
+        profile,
+        vocabulary,
+    ],
+    checks=[
+        *SCHEDULE_CHECKS,
+        *WRITER_CHECKS,
+        check_streaming,
+    ],
+)
+
+PLAN = Schema([*SCHEDULE, seed, vocabulary], checks=SCHEDULE_CHECKS)
+
+APPLY = Schema([username, email, name, directory, staging_directory, backend, extend, worktree, commit_graph, bitmaps, reflog], checks=WRITER_CHECKS)
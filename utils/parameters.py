@@ -1,62 +1,159 @@
-from functools import wraps
-from typing import Callable
+import os
+import sys
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, Optional, Sequence
+
 import click
 
-from utils.config import Config
+from utils.config import Config, load_config
+
+
+@lru_cache(maxsize=None)
+def is_interactive() -> bool:
+    """
+    Whether unresolved parameters should be prompted for, rather than falling back to their defaults.
 
+    Set BATHROOM_TILES_INTERACTIVE to 0 or 1 to choose, otherwise only prompt when stdin is a terminal,
+    so scripted and batch runs never block waiting for input.
 
-def resolve_parameter(config_key: str, description: str, default: Callable, parser: Callable) -> Callable:
+    Returns:
+        bool: True if the user can be prompted.
     """
-    A decorator to resolve parameter values based on a precedence order:
-    1. Command line parameter
+    override = os.environ.get("BATHROOM_TILES_INTERACTIVE")
+    if override:
+        return override != "0"
+
+    return sys.stdin is not None and sys.stdin.isatty()
+
+
+class Parameter(object):
+    """
+    A single parameter, declared once and shared by every command and programmatic caller which takes it.
+
+    Values are resolved based on a precedence order:
+    1. Command line parameter, or the value passed in
     2. Configuration file
-    3. Prompt user for input
+    3. Prompt user for input, when interactive
     4. Default value
 
-    Args:
-        config_key (str): The key to look up in the configuration file.
-        description (str): The message to display when describing the input.
-        default (Any): The default value to use if no input is provided.
+    Methods:
+        option() -> Callable:
+            Creates the click option for the parameter, named after its config key.
 
-    Returns:
-        Callable: A decorator function that wraps the target function.
+        resolve(value: Any, config: Optional[Config], interactive: bool) -> Any:
+            Resolves and parses the parameter's value, raising click.BadParameter if it's invalid.
+    """
+
+    def __init__(self, config_key: str, description: str, default: Callable, parser: Callable) -> None:
+        self.config_key = config_key
+        self.description = description
+        self.default = default
+        self.parser = parser
+
+    def option(self) -> Callable:
+        return click.option(f"--{self.config_key.replace('_', '-')}", help=self.description, default=None)
+
+    def resolve(self, value: Any, config: Optional[Config], interactive: bool) -> Any:
+        if value is None:
+            if config is not None and self.config_key in config and config[self.config_key] is not None:
+                # Parsed once however many runs share the configuration
+                return self._parse(lambda: config.parsed(self.config_key, self.parser))
+
+            # Only now, as some defaults shell out to git
+            value = self.default()
+
+            if interactive:
+                value = click.prompt(
+                    f"Please enter {self.description}",
+                    type=type(value),
+                    default=value,
+                )
+
+        return self._parse(lambda: self.parser(value))
+
+    def _parse(self, parse: Callable[[], Any]) -> Any:
+        try:
+            return parse()
+        except click.BadParameter as e:
+            raise click.BadParameter(f"Invalid value for {self.config_key}: {e.message}") from e
+        except Exception as e:
+            raise click.BadParameter(f"Invalid value for {self.config_key}: {e}") from e
+
+
+class RunSpec(object):
+    """
+    A validated set of parameter values, read as attributes, e.g. spec.from_date.
+
+    Methods:
+        replace(**values: Any) -> RunSpec:
+            Builds a copy with some values changed, validated again.
+
+        as_dict() -> Dict[str, Any]:
+            Gets every value, keyed by parameter.
+    """
+
+    def __init__(self, schema: "Schema", values: Dict[str, Any]) -> None:
+        self.schema = schema
+        self.values = values
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            return self.__dict__["values"][key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __repr__(self) -> str:
+        return f"RunSpec({', '.join(f'{key}={value!r}' for key, value in self.values.items())})"
+
+    def replace(self, **values: Any) -> "RunSpec":
+        return self.schema.build(**{**self.values, **values})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.values)
+
+
+class Schema(object):
+    """
+    The parameters a command takes, and the checks between them, resolved together in one pass.
+
+    Methods:
+        build(config: Optional[Config] = None, interactive: bool = False, **values: Any) -> RunSpec:
+            Resolves every parameter and runs every check, without needing click or reading any files.
+
+        options(func: Callable) -> Callable:
+            A decorator adding a click option for every parameter, passing the command a RunSpec as `spec`.
     """
 
-    def decorator(func: Callable) -> Callable:
-        # Wrap the function with click.option to handle command-line arguments
-        func = click.option(f"--{config_key.replace('_', '-')}", help=description, default=None)(func)
+    def __init__(self, parameters: Sequence[Parameter], checks: Sequence[Callable[[Dict[str, Any]], None]] = ()) -> None:
+        self.parameters = tuple(parameters)
+        self.checks = tuple(checks)
+
+    def build(self, config: Optional[Config] = None, interactive: bool = False, **values: Any) -> RunSpec:
+        unknown = values.keys() - {parameter.config_key for parameter in self.parameters}
+        if unknown:
+            raise click.BadParameter(f"Unknown parameters {', '.join(sorted(unknown))}")
+
+        resolved = {parameter.config_key: parameter.resolve(values.get(parameter.config_key), config, interactive) for parameter in self.parameters}
+
+        # Checks between parameters, once they're all known, skipping any which need parameters this schema doesn't have
+        for check in self.checks:
+            check(resolved)
+
+        return RunSpec(self, resolved)
+
+    def options(self, func: Callable) -> Callable:
+        keys = [parameter.config_key for parameter in self.parameters]
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # If the command-line parameter is provided, use it
-            if kwargs.get(config_key) is None:
-                # Otherwise, load the configuration file and resolve the parameter
-                ctx = click.get_current_context()
-                config = ctx.ensure_object(Config)
-
-                if config_key in config and config[config_key] is not None:
-                    # If the config file has the parameter, use that
-                    kwargs[config_key] = config[config_key]
-                else:
-                    # Otherwise, prompt the user for input as config file doesn't have the parameter
-                    default_value = default()
-
-                    kwargs[config_key] = click.prompt(
-                        f"Please enter {description}",
-                        type=type(default_value),
-                        default=default_value,
-                    )
-
-            # Parse the parameter using the provided parser function
-            try:
-                # We convert to string as cli parameters will arrive as strings, but config files wouldn't
-                # so stringify for consistency
-                kwargs[config_key] = parser(str(kwargs[config_key]))
-            except Exception as e:
-                raise click.BadParameter(f"Invalid value for {config_key}: {e}")
-
-            return func(*args, **kwargs)
+            values = {key: kwargs.pop(key) for key in keys}
 
-        return wrapper
+            # The configuration file is only read once per process, and only by commands which need it
+            spec = self.build(load_config(), is_interactive(), **values)
+
+            return func(*args, spec=spec, **kwargs)
 
-    return decorator
+        for parameter in reversed(self.parameters):
+            wrapper = parameter.option()(wrapper)
+
+        return wrapper
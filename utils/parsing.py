@@ -1,7 +1,7 @@
 import datetime
 from pathlib import Path
 import re
-from typing import Callable
+from typing import Any, Callable, Tuple
 
 import click
 
@@ -10,11 +10,15 @@ def parse_directory() -> Callable:
     """
     Creates a parser function to validate and parse a directory path.
 
+    Whether the directory may already exist depends on the mode, so that's left to the caller.
+
     Returns:
         Callable: A function that validates and parses a directory path.
     """
 
-    def parse(value: str) -> str:
+    def parse(value: Any) -> str:
+        value = str(value)
+
         # Convert to Path object
         repo_path = Path(value).resolve()
 
@@ -22,15 +26,67 @@ def parse_directory() -> Callable:
         if not repo_path.name or not repo_path.name.isascii():
             raise click.BadParameter("Invalid directory name. Must be ascii")
 
-        # Validate path
-        if repo_path.exists():
-            raise click.BadParameter("Invalid directory. Must not exist")
+        return value
+
+    return parse
+
+
+def parse_file() -> Callable:
+    """
+    Creates a parser function to validate the path of an existing file.
+
+    Returns:
+        Callable: A function that validates and parses a file path.
+    """
+
+    def parse(value: Any) -> str:
+        value = str(value)
+
+        if not Path(value).is_file():
+            raise click.BadParameter("Invalid file. Must exist")
 
         return value
 
     return parse
 
 
+def parse_vocabulary() -> Callable:
+    """
+    Creates a parser function to validate a vocabulary file, see load_vocabulary.
+
+    Returns:
+        Callable: A function that validates and parses a vocabulary file path.
+    """
+    parse_path = parse_file()
+
+    def parse(value: Any) -> str:
+        value = parse_path(value)
+
+        # Imported here as it loads numpy, which nothing needs until a vocabulary is given
+        from actions.generate_commit_message import load_vocabulary
+
+        load_vocabulary(value)
+
+        return value
+
+    return parse
+
+
+def check_directory(directory: str, existing: bool) -> None:
+    """
+    Validates that a repository directory does or doesn't already exist.
+
+    Args:
+        directory (str): The directory of the repository.
+        existing (bool): Whether the directory must be an existing repository, rather than not exist at all.
+    """
+    if existing:
+        if not Path(directory, ".git").is_dir():
+            raise click.BadParameter("Invalid directory. Must be an existing repository to extend or resume")
+    elif Path(directory).exists():
+        raise click.BadParameter("Invalid directory. Must not exist")
+
+
 def parse_string(regex: re.Pattern) -> Callable:
     """
     Creates a parser function to validate a string against a regex pattern.
@@ -42,7 +98,10 @@ def parse_string(regex: re.Pattern) -> Callable:
         Callable: A function that validates and parses a string.
     """
 
-    def parse(value: str) -> str:
+    def parse(value: Any) -> str:
+        # Configuration files may hold numbers where a string is wanted
+        value = str(value)
+
         if not regex.match(value):
             raise click.BadParameter(f"Invalid value. Must match {regex.pattern}")
 
@@ -63,11 +122,17 @@ def parse_date(min: datetime.date, max: datetime.date) -> Callable:
         Callable: A function that validates and parses a date string.
     """
 
-    def parse(value: str) -> datetime.date:
-        try:
-            parsed_values = datetime.date.fromisoformat(value)
-        except ValueError:
-            raise click.BadParameter("Invalid date format. Must be iso8601 format")
+    def parse(value: Any) -> datetime.date:
+        # Configuration files and programmatic callers may already have a date
+        if isinstance(value, datetime.datetime):
+            parsed_values = value.date()
+        elif isinstance(value, datetime.date):
+            parsed_values = value
+        else:
+            try:
+                parsed_values = datetime.date.fromisoformat(str(value))
+            except ValueError:
+                raise click.BadParameter("Invalid date format. Must be iso8601 format")
 
         if parsed_values < min or parsed_values > max:
             raise click.BadParameter(f"Date must be between {min} and {max}")
@@ -89,9 +154,12 @@ def parse_int(min: int, max: int) -> Callable:
         Callable: A function that validates and parses an integer.
     """
 
-    def parse(value: str) -> int:
+    def parse(value: Any) -> int:
+        if isinstance(value, bool) or isinstance(value, float):
+            raise click.BadParameter("Invalid value. Must be an integer")
+
         try:
-            parsed_value = int(value)
+            parsed_value = value if isinstance(value, int) else int(value)
         except ValueError:
             raise click.BadParameter("Invalid value. Must be an integer")
 
@@ -103,6 +171,35 @@ def parse_int(min: int, max: int) -> Callable:
     return parse
 
 
+def parse_float(min: float, max: float) -> Callable:
+    """
+    Creates a parser function to validate and parse a floating point number.
+
+    Args:
+        min (float): The minimum allowable value.
+        max (float): The maximum allowable value.
+
+    Returns:
+        Callable: A function that validates and parses a floating point number.
+    """
+
+    def parse(value: Any) -> float:
+        if isinstance(value, bool):
+            raise click.BadParameter("Invalid value. Must be a number")
+
+        try:
+            parsed_value = float(value)
+        except ValueError:
+            raise click.BadParameter("Invalid value. Must be a number")
+
+        if parsed_value < min or parsed_value > max:
+            raise click.BadParameter(f"Value must be between {min} and {max}")
+
+        return parsed_value
+
+    return parse
+
+
 def parse_bool() -> Callable:
     """
     Creates a parser function to validate and parse a boolean value.
@@ -111,12 +208,84 @@ def parse_bool() -> Callable:
         Callable: A function that validates and parses a boolean value.
     """
 
-    def parse(value: str) -> bool:
-        if value.lower() in ["true", "1"]:
+    def parse(value: Any) -> bool:
+        if isinstance(value, bool):
+            return value
+        elif str(value).lower() in ["true", "1"]:
             return True
-        elif value.lower() in ["false", "0"]:
+        elif str(value).lower() in ["false", "0"]:
             return False
         else:
             raise click.BadParameter("Invalid value. Must be true or false")
 
     return parse
+
+
+def parse_choice(choices: list) -> Callable:
+    """
+    Creates a parser function to validate a value against a list of choices.
+
+    Args:
+        choices (list): The allowable values.
+
+    Returns:
+        Callable: A function that validates and parses a choice.
+    """
+
+    def parse(value: Any) -> str:
+        if value not in choices:
+            raise click.BadParameter(f"Invalid value. Must be one of {', '.join(choices)}")
+
+        return value
+
+    return parse
+
+
+def parse_optional(parser: Callable) -> Callable:
+    """
+    Creates a parser function which allows an empty value, otherwise deferring to another parser.
+
+    Args:
+        parser (Callable): The parser to use for non-empty values.
+
+    Returns:
+        Callable: A function that parses a value, or returns None when it's empty.
+    """
+
+    def parse(value: Any) -> Any:
+        if value is None or value == "" or value == "None":
+            return None
+
+        return parser(value)
+
+    return parse
+
+
+def parse_ratio(parts: int) -> Callable:
+    """
+    Creates a parser function to validate and parse a colon separated ratio, e.g. "6:3:1".
+
+    Args:
+        parts (int): The number of parts the ratio must have.
+
+    Returns:
+        Callable: A function that validates and parses a ratio into fractions summing to 1.
+    """
+
+    def parse(value: Any) -> Tuple[float, ...]:
+        # Programmatic callers may pass the parts, or a ratio already parsed
+        parts_given = isinstance(value, (list, tuple)) and value or str(value).split(":")
+
+        try:
+            parsed_values = [float(part) for part in parts_given]
+        except (TypeError, ValueError):
+            raise click.BadParameter(f"Invalid ratio. Must be {parts} numbers separated by colons")
+
+        if len(parsed_values) != parts or any(part < 0 for part in parsed_values) or sum(parsed_values) <= 0:
+            raise click.BadParameter(f"Invalid ratio. Must be {parts} non-negative numbers separated by colons, not all 0")
+
+        total = sum(parsed_values)
+
+        return tuple(part / total for part in parsed_values)
+
+    return parse
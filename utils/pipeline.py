@@ -0,0 +1,81 @@
+import queue
+import threading
+from typing import Generator, Iterable, TypeVar
+
+T = TypeVar("T")
+
+# How often a blocked stage checks whether the stages after it have given up
+POLL_SECONDS = 0.1
+
+# Marks the end of a stage's items
+_DONE = object()
+
+
+class _Failed(object):
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def pipelined(items: Iterable[T], depth: int) -> Generator[T, None, None]:
+    """
+    Iterate in a background thread, handing items over through a bounded queue.
+
+    The thread blocks once `depth` items are waiting, so a stage can never run further
+    ahead of the one consuming it than that, however long the iterable is. Chaining calls,
+    each wrapping a generator over the last, gives a pipeline with backpressure between
+    every stage. Exceptions are raised in the consumer, and closing the consumer early
+    stops the thread.
+
+    Args:
+        items (Iterable[T]): The items to produce, iterated in the background thread.
+        depth (int): The most items produced but not yet consumed.
+
+    Yields:
+        T: The items, in order.
+    """
+    handoff = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item: object) -> bool:
+        while not stopped.is_set():
+            try:
+                handoff.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failed(e))
+            return
+        finally:
+            # Stops any earlier stage this one was consuming, when stopping early
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = handoff.get()
+            if item is _DONE:
+                break
+
+            if isinstance(item, _Failed):
+                raise item.error
+
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Generator, Optional
+
+
+def publish(staged: str, directory: str) -> None:
+    """
+    Move a finished repository into place in one step, so the directory is either absent or complete.
+
+    On the same filesystem that's a single rename. Otherwise the repository is first copied
+    alongside the directory, then renamed into place, so a crash part way through the copy
+    only ever leaves a hidden temporary directory behind, never a partial repository.
+
+    Args:
+        staged (str): The finished repository.
+        directory (str): Where the repository should end up, which mustn't exist yet.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+
+    if os.stat(staged).st_dev == os.stat(parent).st_dev:
+        try:
+            os.rename(staged, directory)
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while publishing {directory}: {str(e)}") from e
+
+        return
+
+    temporary_directory = os.path.join(parent, f".{os.path.basename(directory)}.{uuid.uuid4().hex}")
+
+    try:
+        shutil.copytree(staged, temporary_directory, symlinks=True)
+        os.rename(temporary_directory, directory)
+    except Exception as e:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        raise RuntimeError(f"An unexpected error occurred while publishing {directory}: {str(e)}") from e
+
+
+@contextmanager
+def staged(directory: str, staging_directory: Optional[str]) -> Generator[str, None, None]:
+    """
+    Build a repository in a scratch directory, publishing it to its directory only once the block finishes.
+
+    The scratch copy is removed however the block exits, so a failed run leaves nothing behind
+    in either place. Only a killed process can leave its scratch copy, never a partial repository.
+
+    Args:
+        directory (str): Where the repository should end up.
+        staging_directory (Optional[str]): The scratch directory to build in, e.g. /dev/shm, or None to build in place.
+
+    Yields:
+        str: The directory to build the repository in.
+    """
+    if staging_directory is None:
+        yield directory
+        return
+
+    try:
+        os.makedirs(staging_directory, exist_ok=True)
+        scratch = tempfile.mkdtemp(prefix="bathroom_tiles.", dir=staging_directory)
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred while creating a staging directory in {staging_directory}: {str(e)}") from e
+
+    try:
+        # Created by the build, the same as the directory itself would be
+        staged_directory = os.path.join(scratch, os.path.basename(os.path.abspath(directory)))
+
+        yield staged_directory
+
+        # A run without a single commit never creates the repository, so there's nothing to publish
+        if os.path.isdir(staged_directory):
+            publish(staged_directory, directory)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)